@@ -1,18 +1,93 @@
 # choice_modeling.py
 
-import math
+import functools
+import hashlib
+import json
+from pathlib import Path
 import pandas as pd
 import biogeme.database as db
 import biogeme.biogeme as bio
-from biogeme import models
-from biogeme.expressions import Beta, DefineVariable, log
+from biogeme.expressions import Beta, exp, log
 
-def run_shippers_choice_model(data_path):
+from scoring import prepare_betas, score_batch, score_one
+
+# Indicator-style columns (small integer codes) and continuous attributes in New_data.csv
+_BOOL_COLS = ['Option', 'Micro_hub_with_bike', 'Off_peak', 'Signature', 'Failed_approach',
+              'Tracking', 'Insurance', 'Choice_shipper']
+_CONT_COLS = ['Next_vs_standard_increase', 'Same_vs_standard_increase', 'Delivery_fee_small',
+              'Delivery_fee_Medium', 'Diesel_van']
+# Only the columns the utility consumes, parsed straight into fixed dtypes (no inference pass).
+# Attributes stay float64 (float32 would feed 0.01 in as 0.0099999998); indicators fit int8
+_USED_COLS = _CONT_COLS + _BOOL_COLS
+_DTYPES = {**{c: 'float64' for c in _CONT_COLS}, **{c: 'int8' for c in _BOOL_COLS}}
+# Indicator features derived once in pandas, as name -> (source column, level)
+_INDICATORS = {
+    'Microhub_delivery': ('Micro_hub_with_bike', 1),
+    'Offpeak_delivery': ('Off_peak', 1),
+    'Signature_required': ('Signature', 1),
+    'Redelivery': ('Failed_approach', 1),
+    'With_tracking': ('Tracking', 1),
+    'With_insurance': ('Insurance', 1),
+}
+
+# Optimizer and its relative-gradient stopping tolerance (see _run_shippers_impl). Biogeme's default
+# (eps**(1/3), ~6e-6) only polishes beta digits the scorer never sees
+_ALGORITHM = 'simple_bounds'
+_TOLERANCE = 1e-5
+
+# Bump when the utility or likelihood code changes so cached betas are re-estimated; the data
+# dtypes, indicators and optimizer are hashed into the cache key as well (_estimation_spec)
+MODEL_VERSION = "shippers-v2"
+
+
+def _estimation_spec():
+    """Everything besides the data file that changes the estimates, as stable bytes."""
+    spec = {"version": MODEL_VERSION, "dtypes": _DTYPES, "indicators": _INDICATORS, "algorithm": _ALGORITHM,
+            "tolerance": _TOLERANCE}
+    return json.dumps(spec, sort_keys=True).encode()
+
+
+def _betas_cache_path(data_path):
+    """Cache file for betas estimated on this exact data file + estimation spec."""
+    digest = hashlib.sha256(Path(data_path).read_bytes() + _estimation_spec()).hexdigest()
+    return Path(__file__).with_name(f"shippers_betas_{digest[:16]}.json")
+
+
+@functools.lru_cache(maxsize=4)
+def _run_shippers_impl(data_path, mtime_ns, size, force_reestimate=False):
+    # mtime_ns/size only key the memo so an edited CSV is re-read
+
+    # Reuse betas from an earlier estimation on the same data (skips Biogeme entirely)
+    cache_path = _betas_cache_path(data_path)
+    if cache_path.exists() and not force_reestimate:
+        beta_values = json.loads(cache_path.read_text(encoding="utf-8"))
+        beta_vec, asc = prepare_betas(beta_values)
+        return {"beta_values": beta_values, "beta_vec": beta_vec, "asc": asc,
+                "database": None, "data": None, "pandasResults_shipper": None}
 
     # Read the data
-    df = pd.read_csv(str(data_path), delimiter=",")
+    df = pd.read_csv(str(data_path), delimiter=",", usecols=_USED_COLS, dtype=_DTYPES, engine='c')
+    # Indicators are computed once here, not as a per-row comparison in every likelihood evaluation
+    for name, (col, level) in _INDICATORS.items():
+        df[name] = (df[col] == level).astype('int8')
+    df = df.drop(columns=sorted({col for col, _ in _INDICATORS.values()}))
     database = db.Database('Shipper_selection', df)
-    globals().update(database.variables)
+    
+    # Columns used below, taken from the database (no module-level globals)
+    variables = database.variables
+    Option = variables['Option']
+    Next_vs_standard_increase = variables['Next_vs_standard_increase']
+    Same_vs_standard_increase = variables['Same_vs_standard_increase']
+    Delivery_fee_small = variables['Delivery_fee_small']
+    Delivery_fee_Medium = variables['Delivery_fee_Medium']
+    Diesel_van = variables['Diesel_van']
+    Microhub_delivery = variables['Microhub_delivery']
+    Offpeak_delivery = variables['Offpeak_delivery']
+    Signature_required = variables['Signature_required']
+    Redelivery = variables['Redelivery']
+    With_tracking = variables['With_tracking']
+    With_insurance = variables['With_insurance']
+    Choice_shipper = variables['Choice_shipper']
     
     # Parameters to be estimated
     ASC_accept = Beta('ASC_accept', 0, None, None, 0)
@@ -35,58 +110,52 @@ def run_shippers_choice_model(data_path):
     B_Tracking = Beta('B_Tracking', 0, None, None, 0)
     B_Insurance = Beta('B_Insurance', 0, None, None, 0)
     
-    # Definition of new variables
-    Next_day_delivery_increase = DefineVariable('Next_day_delivery_increase', Next_vs_standard_increase, database)
-    Same_day_delivery_increase = DefineVariable('Same_day_delivery_increase', Same_vs_standard_increase, database)
+    # Derived indicators (Microhub_delivery, Redelivery, ...) come precomputed from _INDICATORS above
     # Standard_delivery = DefineVariable('Standard_delivery', Order_fulfillment_type ==3, database)
-    Small_parcels_delivery_fee = DefineVariable('Small_parcels_delivery_fee', Delivery_fee_small, database)
-    Medium_parcels_delivery_fee = DefineVariable('Medium_parcels_delivery_fee', Delivery_fee_Medium, database)
-    Large_parcels_delivery_fee = DefineVariable('Large_parcels_delivery_fee', Delivery_fee_Large, database)
-    Share_of_diesel_vans = DefineVariable('Share_of_diesel_vans', Diesel_van, database)
-    Share_of_electric_vans = DefineVariable('Share_of_electric_vans', Electic_van, database)
-    Microhub_delivery = DefineVariable('Microhub_delivery', Micro_hub_with_bike== 1, database)
-    Offpeak_delivery = DefineVariable('Offpeak_delivery', Off_peak== 1, database)
-    Signature_required = DefineVariable('Signature_required', Signature == 1, database)
-    Redelivery = DefineVariable('Redelivery', Failed_approach== 1, database)
-    Collection = DefineVariable('Collection', Failed_approach== 2, database)
-    With_tracking = DefineVariable('With_tracking', Tracking== 1, database)
-    With_insurance = DefineVariable('With_insurance', Insurance== 1, database)
     
     # Definition of the utility functions
     V1 = (ASC_accept
-        + B_Next_vs_standard_increase * Next_day_delivery_increase
-        + B_Same_vs_standard_increase * Same_day_delivery_increase 
+        + B_Next_vs_standard_increase * Next_vs_standard_increase
+        + B_Same_vs_standard_increase * Same_vs_standard_increase
         # + B_standard * Standard_delivery
-        + B_Delivery_fee_small * Small_parcels_delivery_fee
-        + B_Delivery_fee_Medium * Medium_parcels_delivery_fee
-        # + B_Delivery_fee_Large * Large_parcels_delivery_fee
-        + B_Diesel_van * Share_of_diesel_vans
-        # + B_Electic_van * Share_of_electric_vans
+        + B_Delivery_fee_small * Delivery_fee_small
+        + B_Delivery_fee_Medium * Delivery_fee_Medium
+        # + B_Delivery_fee_Large * Delivery_fee_Large
+        + B_Diesel_van * Diesel_van
+        # + B_Electic_van * Electic_van
         + B_Micro_hub_with_bike * Microhub_delivery
         + B_Off_peak * Offpeak_delivery
         + B_Signature * Signature_required
         + B_Redelivery * Redelivery
-        # + B_Collection * Collection
+        # + B_Collection * Collection  (add 'Collection': ('Failed_approach', 2) to _INDICATORS)
         + B_Tracking * With_tracking
         + B_Insurance * With_insurance
         )
     
     V2 = ASC_reject
     
-    # Associate utility functions with the numbering of alternatives
-    V = {1: V1, 0: V2}
-    
-    # Associate the availability conditions with the alternatives
+    # Associate the availability conditions with the alternatives (used for the null log likelihood)
     av = {1: Option, 0: Option}
     
     # Definition of the model. This is the contribution of each
-    # observation to the log likelihood function.
-    prob = models.logit(V, av, Choice_shipper)
+    # observation to the log likelihood function. With two alternatives the
+    # logit exp(V1)/(exp(V1)+exp(V2)) is exactly a sigmoid of V1 - V2.
+    prob_accept = 1 / (1 + exp(V2 - V1))
+    prob = Choice_shipper * prob_accept + (1 - Choice_shipper) * (1 - prob_accept)
     logprob=log(prob)
     
     # Create the Biogeme object
     biogeme = bio.BIOGEME(database, logprob)
     biogeme.modelName = 'Shipper_selection'
+    # These are parameter properties of the pinned biogeme (3.2.13, see requirements.txt).
+    # Biogeme's own trust-region Newton/BFGS; `tolerance` is its convergence test (the 'scipy'
+    # algorithm ignores it, and on this data stops at the zero start values)
+    biogeme.algorithm_name = _ALGORITHM
+    biogeme.tolerance = _TOLERANCE
+    # Only beta_values are consumed: skip the HTML report, pickle and per-iteration log
+    biogeme.generate_html = False
+    biogeme.generate_pickle = False
+    biogeme.save_iterations = False
     
     # Calculate the null log likelihood for reporting.
     biogeme.calculateNullLoglikelihood(av)
@@ -99,24 +168,26 @@ def run_shippers_choice_model(data_path):
     stats_logit_shipper = results.getGeneralStatistics()
     pandasResults_shipper = results.getEstimatedParameters()
     
-    return {"beta_values": beta_values, "database": database, "data": df,"pandasResults_shipper":pandasResults_shipper}
+    beta_vec, asc = prepare_betas(beta_values)
+    cache_path.write_text(json.dumps(beta_values, indent=2), encoding="utf-8")
+    
+    return {"beta_values": beta_values, "beta_vec": beta_vec, "asc": asc,
+            "database": database, "data": df,"pandasResults_shipper":pandasResults_shipper}
+
+
+
+def run_shippers_choice_model(data_path, force_reestimate=False):
+    # Memoised per process on (path, mtime, size); force_reestimate bypasses the memo and disk cache
+    stat = Path(data_path).stat()
+    impl = _run_shippers_impl.__wrapped__ if force_reestimate else _run_shippers_impl
+    return impl(str(data_path), stat.st_mtime_ns, stat.st_size, force_reestimate)
+
 
+def calculate_probabilities_shippers_batch(beta_values, df):
+    # One vectorised pass over every row of df (X @ beta + ASC, then logistic)
+    return score_batch(beta_values, df)
 
 
 def calculate_probability_of_selecting_by_shippers(beta_values, observation):
-    utility_new = (
-        beta_values['ASC_accept']
-        + beta_values['B_Next_vs_standard_increase'] * int(observation['Next_day_delivery_increase'])
-        + beta_values['B_Same_vs_standard_increase'] * int(observation['Same_day_delivery_increase'])
-        + beta_values['B_Delivery_fee_small'] * float(observation['Delivery_fee_small'])
-        + beta_values['B_Delivery_fee_Medium'] * float(observation['Medium_parcels_delivery_fee'])
-        + beta_values['B_Diesel_van'] * observation['Share_of_diesel_vans']
-        + beta_values['B_Micro_hub_with_bike'] * observation['Microhub_delivery']
-        + beta_values['B_Off_peak'] * observation['Offpeak_delivery']
-        + beta_values['B_Insurance'] * observation['Insurance']
-        + beta_values['B_Tracking'] * observation['Tracking']
-        + beta_values['B_Redelivery'] * observation['Redelivery']
-        + beta_values['B_Signature'] * observation['Signature_required']
-    )
-    probability = 1 / (1 + math.exp(-utility_new))
+    probability = score_one(beta_values, observation)
     return probability
\ No newline at end of file
@@ -1,40 +1,47 @@
 # Ship_choice.py — lightweight loader using pre-estimated betas (no Biogeme)
-import json
-import math
+from functools import lru_cache
 from pathlib import Path
-import pandas as pd  # only for the type of observation passed in from compute.py
+import numpy as np
+
+try:  # Rust parser when installed; both accept the raw bytes, no str decode
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
+
+from scoring import load_beta_params, score_batch, score_one
 
 _JSON = Path(__file__).with_name("shippers_betas.json")
+_NPY = _JSON.with_suffix(".npy")  # same betas, scorer-ready layout (see export_betas.py)
 
-def run_shippers_choice_model(_data_path_ignored: str):
-    """Load pre-estimated shipper betas from JSON and return the expected dict."""
+@lru_cache(maxsize=1)
+def _load_betas() -> tuple:
+    """
+    (beta dict, beta_vec, asc), parsed on first use and shared by every later caller.
+    A missing file raises, which lru_cache does not remember, so a later retry can succeed.
+    """
     if not _JSON.exists():
         raise FileNotFoundError(f"Missing {_JSON.name}. Generate it with export_betas.py and commit it.")
-    betas = json.loads(_JSON.read_text(encoding="utf-8"))
+    betas = _json_loads(_JSON.read_bytes())
+    beta_vec, asc = load_beta_params(betas, _NPY)  # the .npy, once checked against the JSON
+    return betas, beta_vec, asc
+
+def run_shippers_choice_model(_data_path_ignored: str):
+    """Load pre-estimated shipper betas from JSON and return the expected dict."""
+    betas, beta_vec, asc = _load_betas()
     return {
         "beta_values": betas,
+        "beta_vec": beta_vec,
+        "asc": asc,
         # keep keys the app expects, even if unused now:
         "database": None,
         "data": None,
         "pandasResults_shipper": None,
     }
 
-def calculate_probability_of_selecting_by_shippers(beta_values, observation: pd.DataFrame) -> float:
-    """Compute logistic(prob) using one-row DataFrame `observation` from compute.py."""
-    row = observation.iloc[0]
-    b = lambda k: float(beta_values.get(k, 0.0))
-    x = (
-        b("ASC_accept")
-        + b("B_Next_vs_standard_increase") * float(row["Next_day_delivery_increase"])
-        + b("B_Same_vs_standard_increase") * float(row["Same_day_delivery_increase"])
-        + b("B_Delivery_fee_small")        * float(row["Delivery_fee_small"])
-        + b("B_Delivery_fee_Medium")       * float(row["Medium_parcels_delivery_fee"])
-        + b("B_Diesel_van")                * float(row["Share_of_diesel_vans"])
-        + b("B_Micro_hub_with_bike")       * int(row["Microhub_delivery"])
-        + b("B_Off_peak")                  * int(row["Offpeak_delivery"])
-        + b("B_Insurance")                 * int(row["Insurance"])
-        + b("B_Tracking")                  * int(row["Tracking"])
-        + b("B_Redelivery")                * int(row["Redelivery"])
-        + b("B_Signature")                 * int(row["Signature_required"])
-    )
-    return 1.0 / (1.0 + math.exp(-x))
+def calculate_probabilities_shippers_batch(beta_values, df) -> np.ndarray:
+    """Vectorised P(accept) for every row of `df` (columns as built in compute.py)."""
+    return score_batch(beta_values, df)
+
+def calculate_probability_of_selecting_by_shippers(beta_values, observation) -> float:
+    """Compute logistic(prob) for one observation (Series from compute.py, one-row DataFrame, dict or array)."""
+    return score_one(beta_values, observation)
@@ -4,9 +4,11 @@
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 import streamlit as st
-from base64 import b64encode
+import logging
+from logging.handlers import RotatingFileHandler
 # -------- Player persistence (CSV) --------
 import csv
 from datetime import datetime
@@ -63,7 +65,8 @@ def get_or_create_player(email: str) -> dict:
     return rows[email_key]
 
 def update_player_best(email: str, *, round_id: int,
-                       profit_one_year: float, emission_one_year: float):
+                       profit_one_year: float, emission_one_year: float) -> dict:
+    """Record new 1Y bests; returns the updated record, or {} if nothing changed."""
     email_key = email.strip().lower()
     rows = _load_players()
     if email_key not in rows:
@@ -98,133 +101,73 @@ def update_player_best(email: str, *, round_id: int,
         rec["updated_at"] = datetime.utcnow().isoformat(timespec="seconds")
         rows[email_key] = rec
         _save_players(rows)
-    return changed
-
-# ---------- Background helpers ----------
-def _data_uri_for(name_no_ext: str) -> Optional[str]:
-    """Return a data: URI for name_no_ext.(png|jpg|jpeg|webp) if present next to app.py."""
-    for ext in ("png", "jpg", "jpeg", "webp"):
-        p = Path(__file__).with_name(f"{name_no_ext}.{ext}")
-        if p.exists():
-            data = p.read_bytes()
-            b64 = b64encode(data).decode("ascii")
-            mime = "jpeg" if ext == "jpg" else ext
-            return f"data:image/{mime};base64,{b64}"
-    return None
-
-def _apply_home_background():
-    uri = _data_uri_for("background1")
-    if not uri:
-        return
-    st.markdown(
-        f"""
-        <style>
-        [data-testid="stAppViewContainer"] {{
-          background: url("{uri}") no-repeat center center fixed;
-          background-size: cover;
-        }}
-        .block-container {{
-          background: transparent !important;
-          padding: 38px !important;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-
-def _apply_carrier_background():
-    """Use background2.* if available for Carrier page."""
-    uri = _data_uri_for("background2")
-    if not uri:
-        st.markdown(
-            """
-            <style>
-            [data-testid="stAppViewContainer"] {
-              background: var(--background-color) !important;
-              background-size: auto !important;
-            }
-            .block-container { background: transparent !important; }
-            </style>
-            """,
-            unsafe_allow_html=True,
-        )
-        return
-    st.markdown(
-        f"""
-        <style>
-        [data-testid="stAppViewContainer"] {{
-          background: url("{uri}") no-repeat center center fixed !important;
-          background-size: cover !important;
-        }}
-        .block-container {{ background: transparent !important; }}
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-
-def _ensure_defaults():
-    """Make sure all session_state keys exist before use."""
-    ss = st.session_state
-    # routing
-    ss.setdefault("page", "home")
-    # round/result state
-    ss.setdefault("current_round", 1)
-    ss.setdefault("rounds_results", pd.DataFrame())
-    ss.setdefault("hidden_rounds", [])
-    # panel selections
-    ss.setdefault("top_panel", "strategic")   # 'strategic' | 'operational'
-    ss.setdefault("bottom_panel", "service")  # 'service'   | 'display'
-    # strategic & operational controls
-    ss.setdefault("diesel_share", 60)
-    ss.setdefault("microhub_enabled", False)
-    ss.setdefault("fee_small", 7.0)
-    ss.setdefault("fee_medium", 10.0)
-    ss.setdefault("fee_large", 18.0)
-    ss.setdefault("next_day_inc", 0.20)
-    ss.setdefault("same_day_inc", 0.50)
-    ss.setdefault("offpeak", False)
-    ss.setdefault("redel", True)
-    ss.setdefault("tracking", True)
-    ss.setdefault("insurance", False)
-    ss.setdefault("signature", False)
-    # display options
-    ss.setdefault("show_2m", True)
-    ss.setdefault("show_1y", True)
-    ss.setdefault("show_5y", True)
-    # tour
-    ss.setdefault("tour_step", 0)
+    return rec if changed else {}
 
 # ---------- Models / modules ----------
-from Ship_choice import (
-    run_shippers_choice_model,
-    calculate_probability_of_selecting_by_shippers,
-)
-from Recip_choice import (
-    run_recipients_choice_model,
-    calculate_probability_of_selecting_by_recipients,
+# Model modules, compute and charts (matplotlib) are imported where they're used, so the
+# home page never pays for them
+from constants import COLUMNS
+# Session state, page styles and the cached compute path are shared with app_pre_estimate.py
+from app_common import (
+    COL_IDX, PANEL_HEADINGS, TAB_TYPES, apply_page_styles, compute_round_cached, ensure_defaults,
+    get_ctx, inputs_series, load_shippers_geo_static, load_styles, reset_rounds, rounds_df,
 )
 
-from compute import compute_round_result
-from charts import render_charts_and_tables
-from constants import COLUMNS, init_environment
+@st.cache_resource
+def load_models_static():
+    """Choice-model betas and scoring functions, loaded once per process."""
+    from Ship_choice import (
+        run_shippers_choice_model,
+        calculate_probability_of_selecting_by_shippers,
+        calculate_probabilities_shippers_batch,
+    )
+    from Recip_choice import (
+        run_recipients_choice_model,
+        calculate_probability_of_selecting_by_recipients,
+        calculate_probabilities_recipients_batch,
+    )
+    try:
+        data_path = Path(__file__).with_name("New_data.csv")
+        ship = run_shippers_choice_model(str(data_path))
+        recp = run_recipients_choice_model(str(data_path))
+        return {
+            "shippers_beta_values": ship["beta_values"],
+            "recipients_beta_values": recp["beta_values"],
+            "shippers_beta_params": (ship["beta_vec"], ship["asc"]),
+            "recipients_beta_params": (recp["beta_vec"], recp["asc"]),
+            "calculate_probability_of_selecting_by_shippers": calculate_probability_of_selecting_by_shippers,
+            "calculate_probability_of_selecting_by_recipients": calculate_probability_of_selecting_by_recipients,
+            "calculate_probabilities_shippers_batch": calculate_probabilities_shippers_batch,
+            "calculate_probabilities_recipients_batch": calculate_probabilities_recipients_batch,
+        }
+    except Exception as e:
+        st.error("Failed to load models. Ensure New_data.csv is next to app.py.")
+        st.exception(e); raise
 
 # ---------- Streamlit page & styles ----------
 st.set_page_config(page_title="Urban Freight Simulation Game", layout="wide")
 
-_css_path = Path(__file__).with_name("styles.css")
-if _css_path.exists():
-    st.markdown(f"<style>{_css_path.read_text(encoding='utf-8')}</style>", unsafe_allow_html=True)
-else:
+if not load_styles():
     st.warning("styles.css not found; falling back to default Streamlit styles.")
 
 # ---------- Router ----------
+# Used as on_click callbacks: Streamlit reruns right after a callback, so no st.rerun() here
 def go_home():
     st.session_state.page = "home"
-    st.rerun()
 
 def go_carrier():
     st.session_state.page = "carrier"
-    st.rerun()
+
+def enter_carrier():
+    """on_click for "Enter Carrier Game": check the email gate, register the player, route."""
+    email = st.session_state.get("gate_email", "")
+    if not email or "@" not in email:
+        st.session_state["gate_error"] = "Please enter a valid email address."
+        return
+    rec = get_or_create_player(email)
+    st.session_state["player_email"] = rec["email"]
+    st.session_state["player_record"] = rec  # the carrier caption reads this, not players.csv
+    go_carrier()
 
 # ---------- Tour helpers ----------
 def tour_on() -> bool:
@@ -253,22 +196,47 @@ def tour_nav(prev_step: Optional[int], next_step: Optional[int]):
             if st.button("Next ▶", key=f"tour_next_{next_step}", use_container_width=True):
                 st.session_state.tour_step = next_step; st.rerun()
 
+# Built once; tour_tip only fills in the fields
+_TOUR_TIP_TMPL = (
+    '<div class="tour-tip" style="max-width:{w}px">'
+    '<div class="tour-tip-title">{t}</div>'
+    '<div class="tour-tip-body">{b}{j}</div>'
+    "</div>"
+)
+_TOUR_JUMP_TMPL = ' <a href="#{}">Jump ↘</a>'
+
 def tour_tip(title: str, body: str, width_px: int = 320, anchor_id: Optional[str] = None):
-    jump = f' <a href="#{anchor_id}">Jump ↘</a>' if anchor_id else ""
+    jump = _TOUR_JUMP_TMPL.format(anchor_id) if anchor_id else ""
     st.markdown(
-        f"""
-        <div class="tour-tip" style="max-width:{width_px}px">
-            <div class="tour-tip-title">{title}</div>
-            <div class="tour-tip-body">{body}{jump}</div>
-        </div>
-        """,
+        _TOUR_TIP_TMPL.format(w=width_px, t=title, b=body, j=jump),
         unsafe_allow_html=True,
     )
 
 # ---------- Home ----------
+# Placeholder module cards share one template and are formatted once at import
+_MODULE_CARD_TMPL = (
+    '<div class="card module-card">'
+    '<div class="pilltitle">{icon} {title}</div>'
+    '<div class="sub">{desc}</div>'
+    '<div class="module-card-actions">'
+    '<button class="btn btn-disabled" disabled>Under development</button>'
+    "</div></div>"
+)
+_RECIPIENT_CARD_HTML = _MODULE_CARD_TMPL.format(
+    icon="🎯", title="Parcel Recipient",
+    desc="Evaluate delivery preferences, WTP, and service trade-offs.",
+)
+_MODULE_ROW_HTML = '<div class="module-row">{}</div>'.format("".join(
+    _MODULE_CARD_TMPL.format(icon=icon, title=title, desc=desc)
+    for icon, title, desc in (
+        ("🏪", "Shipper", "Choose carrier partnerships, pricing, and bundles to capture market share."),
+        ("🏛️", "Government", "Test policies (e.g., off-peak incentives, microhubs) and observe system-wide impacts."),
+    )
+))
+
 def render_home():
-    _ensure_defaults()
-    _apply_home_background()
+    ensure_defaults()
+    apply_page_styles("home")
     st.markdown('<div class="home-top-gap"></div>', unsafe_allow_html=True)
     left, right = st.columns([1, 2], gap="large")
 
@@ -313,18 +281,7 @@ def render_home():
 
         # -------- Parcel Recipient card (unchanged) --------
         with g1:
-            st.markdown(
-                """
-                <div class="card module-card">
-                  <div class="pilltitle">🎯 Parcel Recipient</div>
-                  <div class="sub">Evaluate delivery preferences, WTP, and service trade-offs.</div>
-                  <div class="module-card-actions">
-                    <button class="btn btn-disabled" disabled>Under development</button>
-                  </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
+            st.markdown(_RECIPIENT_CARD_HTML, unsafe_allow_html=True)
 
         # -------- Carrier Game card with email gate --------
         with g2:
@@ -339,65 +296,37 @@ def render_home():
             )
 
             # Email gate
-            email = st.text_input(
+            st.text_input(
                 "Enter your email to play",
                 key="gate_email",
                 placeholder="name@example.com",
             )
-            enter_clicked = st.button(
+            st.button(
                 "Enter Carrier Game",
                 key="btn_carrier",
                 type="primary",
                 use_container_width=True,
+                on_click=enter_carrier,
             )
 
-            if enter_clicked:
-                if not email or "@" not in email:
-                    st.error("Please enter a valid email address.")
-                else:
-                    rec = get_or_create_player(email)
-                    st.session_state["player_email"] = rec["email"]
-                    go_carrier()
+            gate_error = st.session_state.pop("gate_error", None)
+            if gate_error:
+                st.error(gate_error)
 
-            st.markdown("</div></div>", unsafe_allow_html=True)
-
-        r2c1, r2c2 = st.columns(2, gap="large")
-        with r2c1:
-            st.markdown(
-                """
-                <div class="card module-card">
-                  <div class="pilltitle">🏪 Shipper</div>
-                  <div class="sub">Choose carrier partnerships, pricing, and bundles to capture market share.</div>
-                  <div class="module-card-actions">
-                    <button class="btn btn-disabled" disabled>Under development</button>
-                  </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-        with r2c2:
-            st.markdown(
-                """
-                <div class="card module-card">
-                  <div class="pilltitle">🏛️ Government</div>
-                  <div class="sub">Test policies (e.g., off-peak incentives, microhubs) and observe system-wide impacts.</div>
-                  <div class="module-card-actions">
-                    <button class="btn btn-disabled" disabled>Under development</button>
-                  </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
+        # Shipper + Government cards: static HTML only, so one element for the whole row
+        st.markdown(_MODULE_ROW_HTML, unsafe_allow_html=True)
 
 # ---------- Carrier ----------
 def render_carrier():
-    _ensure_defaults()
-    _apply_carrier_background()
+    from charts import render_charts_and_tables
+
+    ensure_defaults()
+    apply_page_styles("carrier")
     
 # ---- SHOW PLAYER INFO IF LOGGED IN ----
     player_email = st.session_state.get("player_email", "")
     if player_email:
-        rec = get_or_create_player(player_email)
+        rec = st.session_state.get("player_record") or get_or_create_player(player_email)
         st.caption(
             f"Player: **{player_email}** | Best profit (1Y): "
             f"{rec.get('best_profit_one_year') or '—'} "
@@ -408,72 +337,12 @@ def render_carrier():
     else:
         st.warning("⚠️ No email detected. Go back and enter your email to track your results.")
 
-    # CSS: give Streamlit containers a translucent white background when they contain a sentinel.
-    # Also give H4/H5 headings a soft background so titles are readable over the image.
-    st.markdown("""
-    <style>
-      /* Soft background behind H4/H5 titles (Inputs / Outputs etc.) */
-      h4, h5 {
-        display:inline-block;
-        background: rgba(255,255,255,0.85);
-        padding: 4px 8px;
-        border-radius: 8px;
-        margin-bottom: 8px;
-      }
-    
-      /* ------------ Translucent card for the REAL Streamlit panel containers ------------ */
-      /* Catch the VerticalBlock that CONTAINS the sentinel (no need to be a direct child) */
-      [data-testid="stVerticalBlock"]:has(.panel-sentinel),
-      /* Also catch a nested VerticalBlock/Container that contains the sentinel
-         (Streamlit sometimes nests blocks differently between versions) */
-      [data-testid="stVerticalBlock"] [data-testid="stVerticalBlock"]:has(.panel-sentinel),
-      [data-testid="stContainer"]:has(.panel-sentinel) {
-        background: rgba(255,255,255,0.80) !important;   /* <<< the white with 0.8 transparency */
-        border: 1px solid rgba(148,163,184,.35) !important;
-        border-radius: 12px !important;
-        box-shadow: 0 10px 24px rgba(0,0,0,.08) !important;
-        padding: 12px !important;
-        /* give some breathing room so it doesn't sit right on the image */
-        margin-bottom: 10px !important;
-        backdrop-filter: saturate(120%) blur(2px);
-      }
-    
-      /* Make the left-side UI a bit denser */
-      #left-ui { font-size: 0.92rem; }
-    
-      /* Tighten page top spacing on Carrier only */
-      .block-container { padding-top: 14px !important; }
-    </style>
-    """, unsafe_allow_html=True)
-
-
     st.button("← Back to main menu", on_click=go_home)
 
     # ----- Models & data (cached) -----
-    @st.cache_resource
-    def load_models_static():
-        try:
-            data_path = Path(__file__).with_name("New_data.csv")
-            ship = run_shippers_choice_model(str(data_path))
-            recp = run_recipients_choice_model(str(data_path))
-            return {
-                "shippers_beta_values": ship["beta_values"],
-                "recipients_beta_values": recp["beta_values"],
-                "calculate_probability_of_selecting_by_shippers": calculate_probability_of_selecting_by_shippers,
-                "calculate_probability_of_selecting_by_recipients": calculate_probability_of_selecting_by_recipients,
-            }
-        except Exception as e:
-            st.error("Failed to load models. Ensure New_data.csv is next to app.py.")
-            st.exception(e); raise
-
-    @st.cache_resource
-    def load_shippers_geo_static():
-        csv_path = Path(__file__).with_name("shipper_data.csv")
-        return pd.read_csv(csv_path, delimiter=",")
-
     models = load_models_static()
     shippers_geo = load_shippers_geo_static()
-    ctx = init_environment(shippers_geo)
+    ctx = get_ctx(shippers_geo)
 
     curr = st.session_state.current_round
 
@@ -484,126 +353,126 @@ def render_carrier():
     with dashboard:
         st.markdown('<div id="left-ui">', unsafe_allow_html=True)
 
-        # ---- Top tabs row (Strategic / Operational) ----
-        c1, c2 = st.columns(2, gap="small")
-        with c1:
-            if st.button("🎯 Strategic", use_container_width=True,
-                         type=("primary" if st.session_state.top_panel == "strategic" else "secondary")):
-                st.session_state.top_panel = "strategic"
-        with c2:
-            if st.button("🛠️ Operational", use_container_width=True,
-                         type=("primary" if st.session_state.top_panel == "operational" else "secondary")):
-                st.session_state.top_panel = "operational"
-
-        # ---- Top panel content (sentinel makes the parent block get a white translucent background) ----
-        top_panel = st.container()
-        with top_panel:
-            st.markdown('<div class="panel-sentinel"></div>', unsafe_allow_html=True)  # << sentinel
-            st.markdown(f"#### {'Strategic' if st.session_state.top_panel=='strategic' else 'Operational'}")
-
-            if st.session_state.top_panel == "strategic":
-                colA, colB = st.columns(2, gap="small")
-                with colA:
-                    st.session_state.diesel_share = st.slider(
-                        "Diesel share (%)", 0, 100, st.session_state.diesel_share, 1
-                    )
-                with colB:
-                    st.session_state.microhub_enabled = st.checkbox(
-                        "Microhub delivery ⓘ",
-                        value=st.session_state.microhub_enabled,
-                        help="Vans to a microhub area; final addresses by (e-)cargo bikes."
-                    )
-            else:
-                r1c1, r1c2 = st.columns(2, gap="small")
-                with r1c1:
-                    st.session_state.fee_small = st.slider(
-                        "Small (AUD)", 0.0, 20.0, st.session_state.fee_small, 0.5
-                    )
-                with r1c2:
-                    st.session_state.fee_medium = st.slider(
-                        "Medium (AUD)", 0.0, 20.0, st.session_state.fee_medium, 0.5
-                    )
-
-                r2c1, r2c2 = st.columns(2, gap="small")
-                with r2c1:
-                    st.session_state.fee_large = st.slider(
-                        "Large (AUD)", 0.0, 20.0, st.session_state.fee_large, 0.5
-                    )
-                with r2c2:
-                    st.session_state.next_day_inc = st.slider(
-                        "Next-day (× vs standard)", 0.0, 10.0,
-                        st.session_state.next_day_inc, 0.05
-                    )
-
-                r3c1, r3c2 = st.columns(2, gap="small")
-                with r3c1:
-                    st.session_state.same_day_inc = st.slider(
-                        "Same-day (× vs standard)", 0.0, 10.0,
-                        st.session_state.same_day_inc, 0.05
-                    )
-                with r3c2:
-                    st.markdown("&nbsp;")
-
-        # ---- Bottom tabs row (Service / Display) ----
-        c3, c4 = st.columns(2, gap="small")
-        with c3:
-            if st.button("📦 Service", use_container_width=True,
-                         type=("primary" if st.session_state.bottom_panel == "service" else "secondary")):
-                st.session_state.bottom_panel = "service"
-        with c4:
-            if st.button("📊 Display", use_container_width=True,
-                         type=("primary" if st.session_state.bottom_panel == "display" else "secondary")):
-                st.session_state.bottom_panel = "display"
-
-        # ---- Bottom panel content (sentinel again for background) ----
-        bottom_panel = st.container()
-        with bottom_panel:
-            st.markdown('<div class="panel-sentinel"></div>', unsafe_allow_html=True)  # << sentinel
-            st.markdown(f"#### {'Service' if st.session_state.bottom_panel=='service' else 'Display options'}")
-
-            if st.session_state.bottom_panel == "service":
-                s1, s2 = st.columns(2, gap="small")
-                with s1:
-                    st.session_state.offpeak   = st.toggle("Off-peak",   value=st.session_state.offpeak)
-                with s2:
-                    st.session_state.redel     = st.toggle("Redelivery", value=st.session_state.redel)
-
-                s3, s4 = st.columns(2, gap="small")
-                with s3:
-                    st.session_state.tracking  = st.toggle("Tracking",   value=st.session_state.tracking)
-                with s4:
-                    st.session_state.insurance = st.toggle("Insurance",  value=st.session_state.insurance)
-
-                s5, _ = st.columns(2, gap="small")
-                with s5:
-                    st.session_state.signature = st.toggle("Signature",  value=st.session_state.signature)
-            else:
-                d1, d2 = st.columns(2, gap="small")
-                with d1:
-                    st.session_state.show_2m = st.checkbox("2M (two months)", value=st.session_state.show_2m)
-                with d2:
-                    st.session_state.show_1y = st.checkbox("1Y (one year)",   value=st.session_state.show_1y)
-
-                d3, _ = st.columns(2, gap="small")
-                with d3:
-                    st.session_state.show_5y = st.checkbox("5Y (five years)", value=st.session_state.show_5y)
-
-                with st.expander("More display controls", expanded=False):
-                    all_round_ids = (
-                        st.session_state.rounds_results["Round ID"].astype(int).tolist()
-                        if not st.session_state.rounds_results.empty else []
-                    )
-                    st.session_state.hidden_rounds = st.multiselect(
-                        "Hide rounds from display (non-destructive)",
-                        options=all_round_ids,
-                        default=st.session_state.hidden_rounds,
-                        placeholder="Select Round IDs to hide…",
-                    )
-
-        # ---- Reset / Run buttons (below panels) ----
-        b1, b2 = st.columns(2, gap="small")
-        reset_clicked = b1.button("Reset", use_container_width=True)
-        run_clicked   = b2.button("Run this round", type="primary", use_container_width=True)
+        # One form for every round control: dragging sliders / flipping toggles no longer
+        # reruns the script; tab switches, Apply, Reset and Run submit the batch.
+        with st.form("carrier_form", border=False):
+            # ---- Top tabs row (Strategic / Operational) ----
+            strat_type, op_type = TAB_TYPES[st.session_state.top_panel]
+            c1, c2 = st.columns(2, gap="small")
+            with c1:
+                if st.form_submit_button("🎯 Strategic", use_container_width=True,
+                             type=strat_type):
+                    st.session_state.top_panel = "strategic"
+            with c2:
+                if st.form_submit_button("🛠️ Operational", use_container_width=True,
+                             type=op_type):
+                    st.session_state.top_panel = "operational"
+
+            # ---- Top panel content (sentinel makes the parent block get a white translucent background) ----
+            top_panel = st.container()
+            with top_panel:
+                st.markdown(PANEL_HEADINGS[st.session_state.top_panel], unsafe_allow_html=True)
+
+                if st.session_state.top_panel == "strategic":
+                    colA, colB = st.columns(2, gap="small")
+                    with colA:
+                        st.session_state.diesel_share = st.slider(
+                            "Diesel share (%)", 0, 100, st.session_state.diesel_share, 1
+                        )
+                    with colB:
+                        st.session_state.microhub_enabled = st.checkbox(
+                            "Microhub delivery ⓘ",
+                            value=st.session_state.microhub_enabled,
+                            help="Vans to a microhub area; final addresses by (e-)cargo bikes."
+                        )
+                else:
+                    r1c1, r1c2 = st.columns(2, gap="small")
+                    with r1c1:
+                        st.session_state.fee_small = st.slider(
+                            "Small (AUD)", 0.0, 20.0, st.session_state.fee_small, 0.5
+                        )
+                    with r1c2:
+                        st.session_state.fee_medium = st.slider(
+                            "Medium (AUD)", 0.0, 20.0, st.session_state.fee_medium, 0.5
+                        )
+
+                    r2c1, r2c2 = st.columns(2, gap="small")
+                    with r2c1:
+                        st.session_state.fee_large = st.slider(
+                            "Large (AUD)", 0.0, 20.0, st.session_state.fee_large, 0.5
+                        )
+                    with r2c2:
+                        st.session_state.next_day_inc = st.slider(
+                            "Next-day (× vs standard)", 0.0, 10.0,
+                            st.session_state.next_day_inc, 0.05
+                        )
+
+                    r3c1, r3c2 = st.columns(2, gap="small")
+                    with r3c1:
+                        st.session_state.same_day_inc = st.slider(
+                            "Same-day (× vs standard)", 0.0, 10.0,
+                            st.session_state.same_day_inc, 0.05
+                        )
+                    with r3c2:
+                        st.markdown("&nbsp;")
+
+            # ---- Bottom tabs row (Service / Display) ----
+            service_type, display_type = TAB_TYPES[st.session_state.bottom_panel]
+            c3, c4 = st.columns(2, gap="small")
+            with c3:
+                if st.form_submit_button("📦 Service", use_container_width=True,
+                             type=service_type):
+                    st.session_state.bottom_panel = "service"
+            with c4:
+                if st.form_submit_button("📊 Display", use_container_width=True,
+                             type=display_type):
+                    st.session_state.bottom_panel = "display"
+
+            # ---- Bottom panel content (sentinel again for background) ----
+            bottom_panel = st.container()
+            with bottom_panel:
+                st.markdown(PANEL_HEADINGS[st.session_state.bottom_panel], unsafe_allow_html=True)
+
+                if st.session_state.bottom_panel == "service":
+                    s1, s2 = st.columns(2, gap="small")
+                    with s1:
+                        st.session_state.offpeak   = st.toggle("Off-peak",   value=st.session_state.offpeak)
+                    with s2:
+                        st.session_state.redel     = st.toggle("Redelivery", value=st.session_state.redel)
+
+                    s3, s4 = st.columns(2, gap="small")
+                    with s3:
+                        st.session_state.tracking  = st.toggle("Tracking",   value=st.session_state.tracking)
+                    with s4:
+                        st.session_state.insurance = st.toggle("Insurance",  value=st.session_state.insurance)
+
+                    s5, _ = st.columns(2, gap="small")
+                    with s5:
+                        st.session_state.signature = st.toggle("Signature",  value=st.session_state.signature)
+                else:
+                    d1, d2 = st.columns(2, gap="small")
+                    with d1:
+                        st.session_state.show_2m = st.checkbox("2M (two months)", value=st.session_state.show_2m)
+                    with d2:
+                        st.session_state.show_1y = st.checkbox("1Y (one year)",   value=st.session_state.show_1y)
+
+                    d3, _ = st.columns(2, gap="small")
+                    with d3:
+                        st.session_state.show_5y = st.checkbox("5Y (five years)", value=st.session_state.show_5y)
+
+                    with st.expander("More display controls", expanded=False):
+                        st.session_state.hidden_rounds = st.multiselect(
+                            "Hide rounds from display (non-destructive)",
+                            options=st.session_state.round_ids,
+                            default=st.session_state.hidden_rounds,
+                            placeholder="Select Round IDs to hide…",
+                        )
+                    st.form_submit_button("Apply display options", use_container_width=True)
+
+            # ---- Reset / Run buttons (below panels) ----
+            b1, b2 = st.columns(2, gap="small")
+            reset_clicked = b1.form_submit_button("Reset", use_container_width=True)
+            run_clicked   = b2.form_submit_button("Run this round", type="primary", use_container_width=True)
 
         # Tour button BELOW the panels (always active)
         tour_box = st.container()
@@ -639,38 +508,37 @@ def render_carrier():
     # ===== Reset / Run =====
     latest_inputs_series = None
     if reset_clicked:
-        st.session_state.current_round = 1
-        st.session_state.rounds_results = pd.DataFrame()
-        st.session_state.hidden_rounds = []
+        reset_rounds()
         st.rerun()
 
     if run_clicked:
-        latest_inputs_series = pd.Series({
-            "Next_day_delivery_increase": float(next_day_inc),
-            "Same_day_delivery_increase": float(same_day_inc),
-            "Delivery_fee_small": float(fee_small),
-            "Medium_parcels_delivery_fee": float(fee_medium),
-            "Large_parcels_delivery_fee": float(fee_large),
-            "Share_of_diesel_vans": float(diesel_share),
-            "Share_of_electric_vans": float(100 - diesel_share),
-            "Microhub_delivery": int(microhub_enabled),
-            "Offpeak_delivery": int(offpeak),
-            "Signature_required": int(signature),
-            "Redelivery": int(redel),
-            "Tracking": int(tracking),
-            "Insurance": int(insurance),
-        })[COLUMNS]
+        inputs = np.empty(len(COLUMNS), dtype=np.float64)
+        inputs[COL_IDX["Next_day_delivery_increase"]] = next_day_inc
+        inputs[COL_IDX["Same_day_delivery_increase"]] = same_day_inc
+        inputs[COL_IDX["Delivery_fee_small"]] = fee_small
+        inputs[COL_IDX["Medium_parcels_delivery_fee"]] = fee_medium
+        inputs[COL_IDX["Large_parcels_delivery_fee"]] = fee_large
+        inputs[COL_IDX["Share_of_diesel_vans"]] = diesel_share
+        inputs[COL_IDX["Share_of_electric_vans"]] = 100 - diesel_share
+        inputs[COL_IDX["Microhub_delivery"]] = int(microhub_enabled)
+        inputs[COL_IDX["Offpeak_delivery"]] = int(offpeak)
+        inputs[COL_IDX["Signature_required"]] = int(signature)
+        inputs[COL_IDX["Redelivery"]] = int(redel)
+        inputs[COL_IDX["Tracking"]] = int(tracking)
+        inputs[COL_IDX["Insurance"]] = int(insurance)
+        latest_inputs_series = inputs_series(inputs)
         try:
-            row = compute_round_result(curr, latest_inputs_series, COLUMNS, models, ctx)
+            row = compute_round_cached(
+                tuple(inputs.tolist()), tuple(COLUMNS), models, ctx
+            )
+            row["Round ID"] = curr  # st.cache_data hands back a fresh copy per call
         except Exception as e:
             st.error(f"Round {curr} failed to compute.")
             st.exception(e); row = None
 
         if row is not None:
-            st.session_state.rounds_results = pd.concat(
-                [st.session_state.rounds_results, pd.DataFrame([row])],
-                ignore_index=True
-            )
+            st.session_state.rounds_rows.append(row)
+            st.session_state.round_ids.append(curr)
             st.session_state.current_round = curr + 1
             st.success(f"Round {curr} appended.")
 
@@ -686,14 +554,16 @@ def render_carrier():
                 emission_one_year=emis_1y,
             )
             if changed:
+                if "player_record" in st.session_state:
+                    st.session_state["player_record"].update(changed)
                 st.toast("🔖 Your best results have been updated.", icon="✅")
 
     # ===== RIGHT: charts + tables =====
     with main:
-        render_charts_and_tables(st.session_state.rounds_results.copy(), latest_inputs_series, curr)
+        render_charts_and_tables(rounds_df(), latest_inputs_series, curr)
 
         # Tour steps 3–6 (right side)
-        if not st.session_state.rounds_results.empty:
+        if st.session_state.rounds_rows:
             if tour_step_is(3):
                 tour_tip("Profit charts", "Compare profits over 2M / 1Y / 5Y horizons by round.", anchor_id="profit-chart")
                 tour_nav(prev_step=2, next_step=4)
@@ -709,15 +579,24 @@ def render_carrier():
 
 
 # ---------- Seatbelt ----------
+# The logger outlives script reruns, so the handler is attached only once per process.
+# The file is opened on the first error and rotated at 1 MB (3 backups kept).
+_logger = logging.getLogger("urban_freight")
+if not _logger.handlers:
+    _log_handler = RotatingFileHandler(
+        "streamlit_error.log", maxBytes=1_000_000, backupCount=3, encoding="utf-8", delay=True
+    )
+    _log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    _logger.addHandler(_log_handler)
+    _logger.propagate = False
+
 def safe_render(fn):
     try:
         fn()
     except Exception as e:
-        import traceback
         st.error("⚠️ Something went wrong, but the app is still running.")
         st.exception(e)
-        with open("streamlit_error.log", "a", encoding="utf-8") as f:
-            f.write("\n\n" + traceback.format_exc())
+        _logger.exception("render failed")
 
 # ---------- Render ----------
 if st.session_state.get("page", "home") == "home":
@@ -0,0 +1,275 @@
+# app_common.py — session state, background/CSS and compute helpers shared by app.py and app_pre_estimate.py
+from base64 import b64encode
+from pathlib import Path
+from typing import Optional
+import pandas as pd
+import streamlit as st
+
+from constants import COLUMNS, SHIPPER_GEO_DTYPES, Ctx, init_environment
+
+# ---------- Background helpers ----------
+# Background images live in ./static/, served at app/static/ (see .streamlit/config.toml)
+_STATIC_DIR = Path(__file__).with_name("static")
+
+@st.cache_resource(show_spinner=False)
+def _find_image_cached(name_no_ext: str, dir_mtime_ns: int) -> Optional[Path]:
+    """First static/name_no_ext.(png|jpg|jpeg|webp) that exists; dir_mtime_ns only keys the cache."""
+    for ext in ("png", "jpg", "jpeg", "webp"):
+        p = _STATIC_DIR / f"{name_no_ext}.{ext}"
+        if p.exists():
+            return p
+    return None
+
+def _find_image(name_no_ext: str) -> Optional[Path]:
+    """
+    First static/name_no_ext.(png|jpg|jpeg|webp) that exists, or None.
+    One stat of static/ per call; the extensions are only probed again once a file there is added or removed.
+    """
+    try:
+        dir_mtime_ns = _STATIC_DIR.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+    return _find_image_cached(name_no_ext, dir_mtime_ns)
+
+def _data_uri(path: str) -> str:
+    """base64 data: URI for an image file."""
+    p = Path(path)
+    b64 = b64encode(p.read_bytes()).decode("ascii")
+    ext = p.suffix[1:]
+    mime = "jpeg" if ext == "jpg" else ext
+    return f"data:image/{mime};base64,{b64}"
+
+def _background_url(path: str, mtime_ns: int) -> str:
+    """
+    URL for a background image: the static route (one browser-cached GET) when static
+    serving is on, otherwise an inline data: URI as a fallback.
+    The ?v=<mtime> suffix lets the browser keep the image cached until the file is replaced.
+    """
+    if st.get_option("server.enableStaticServing"):
+        return f"app/static/{Path(path).name}?v={mtime_ns}"
+    return _data_uri(path)
+
+def _home_bg_css(uri: Optional[str]) -> Optional[str]:
+    """Home-page background <style> block for an image URL (None without an image)."""
+    if not uri:
+        return None
+    return f"""
+        <style>
+        [data-testid="stAppViewContainer"] {{
+          background: url("{uri}") no-repeat center center fixed;
+          background-size: cover;
+        }}
+        .block-container {{
+          background: transparent !important;
+          padding: 38px !important;
+        }}
+        </style>
+        """
+
+def _carrier_bg_css(uri: Optional[str]) -> str:
+    """Carrier-page background <style> block: the background2.* URL if given, else the theme colour."""
+    if not uri:
+        return """
+            <style>
+            [data-testid="stAppViewContainer"] {
+              background: var(--background-color) !important;
+              background-size: auto !important;
+            }
+            .block-container { background: transparent !important; }
+            </style>
+            """
+    return f"""
+        <style>
+        [data-testid="stAppViewContainer"] {{
+          background: url("{uri}") no-repeat center center fixed !important;
+          background-size: cover !important;
+        }}
+        .block-container {{ background: transparent !important; }}
+        </style>
+        """
+
+# ---------- Session state ----------
+# Initial session_state values; a callable (list) is a factory so every session gets its own object
+_DEFAULTS = {
+    # routing
+    "page": "home",
+    # round/result state
+    "current_round": 1,
+    "rounds_rows": list,  # one dict per round; see rounds_df()
+    "round_ids": list,    # "Round ID" of each entry in rounds_rows, kept in step
+    "hidden_rounds": list,
+    # panel selections
+    "top_panel": "strategic",   # 'strategic' | 'operational'
+    "bottom_panel": "service",  # 'service'   | 'display'
+    # strategic & operational controls
+    "diesel_share": 60,
+    "microhub_enabled": False,
+    "fee_small": 7.0,
+    "fee_medium": 10.0,
+    "fee_large": 18.0,
+    "next_day_inc": 0.20,
+    "same_day_inc": 0.50,
+    "offpeak": False,
+    "redel": True,
+    "tracking": True,
+    "insurance": False,
+    "signature": False,
+    # display options
+    "show_2m": True,
+    "show_1y": True,
+    "show_5y": True,
+    # tour
+    "tour_step": 0,
+}
+
+def ensure_defaults():
+    """Make sure all session_state keys exist before use (filled once per session)."""
+    ss = st.session_state
+    if ss.get("_defaults_set"):
+        return
+    for k, v in _DEFAULTS.items():
+        ss.setdefault(k, v() if callable(v) else v)
+    ss["_defaults_set"] = True
+
+# Round/result keys that Reset puts back to their _DEFAULTS values
+_ROUND_STATE_KEYS = ("current_round", "rounds_rows", "round_ids", "hidden_rounds")
+
+def reset_rounds():
+    """Clear the round history back to its defaults and drop the frame cached from it."""
+    ss = st.session_state
+    for k in _ROUND_STATE_KEYS:
+        v = _DEFAULTS[k]
+        ss[k] = v() if callable(v) else v
+    ss.pop("_rounds_df_cache", None)
+
+def rounds_df() -> pd.DataFrame:
+    """
+    DataFrame view of st.session_state.rounds_rows (a list of per-round dicts).
+    Rebuilt only after rows are appended or the list is replaced (Reset / CSV upload).
+    """
+    rows = st.session_state.rounds_rows
+    cached = st.session_state.get("_rounds_df_cache")
+    if cached is None or cached[0] is not rows or cached[1] != len(rows):
+        cached = (rows, len(rows), pd.DataFrame(rows))
+        st.session_state["_rounds_df_cache"] = cached
+    return cached[2]
+
+# ---------- Environment / compute ----------
+# Compute (and the model modules behind it) is imported where it's used, so the home page never pays for it
+
+# Position of each input feature in COLUMNS, so the Run path fills a flat array
+COL_IDX = {c: i for i, c in enumerate(COLUMNS)}
+# Positions of the on/off levers, which are shown and stored as 0/1 ints
+_LEVER_IDX = tuple(COL_IDX[c] for c in ("Microhub_delivery", "Offpeak_delivery", "Signature_required",
+                                        "Redelivery", "Tracking", "Insurance"))
+
+def inputs_series(inputs) -> pd.Series:
+    """
+    The run's float64 input array (COLUMNS order) as a Series for the inputs table and the
+    player record, with the levers back as 0/1 ints (the array itself keys compute_round_cached).
+    """
+    values = inputs.tolist()
+    for i in _LEVER_IDX:
+        values[i] = int(values[i])
+    return pd.Series(values, index=COLUMNS, dtype=object)
+
+@st.cache_resource
+def load_shippers_geo_static():
+    """Shipper distance/volume table used by init_environment(), read once per process."""
+    csv_path = Path(__file__).with_name("shipper_data.csv")
+    return pd.read_csv(
+        csv_path, delimiter=",", usecols=list(SHIPPER_GEO_DTYPES), dtype=SHIPPER_GEO_DTYPES, engine="c"
+    )
+
+@st.cache_resource(show_spinner=False)
+def get_ctx(_geo: pd.DataFrame) -> Ctx:
+    """
+    init_environment() once per process. _geo is the cache_resource shipper frame (same object
+    every rerun), so the leading underscore skips hashing it.
+    """
+    return init_environment(_geo)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def compute_round_cached(inputs: tuple, cols: tuple, _models, _ctx) -> dict:
+    """
+    compute_round_result memoised on the input values (a tuple of floats is cheap to hash).
+    models/ctx are per-process constants, so the leading underscore keeps them out of the key.
+    "Round ID" is left as None; the caller stamps it on the returned copy.
+    The run handler fills every column from the widgets, so the sanitize pass is skipped.
+    """
+    from compute import compute_round_result
+
+    return compute_round_result(
+        None, pd.Series(inputs, index=list(cols)), list(cols), _models, _ctx, assume_clean=True
+    )
+
+# ---------- Page styles ----------
+@st.cache_resource(show_spinner=False)
+def load_styles() -> str:
+    """styles.css contents, read once per process ("" if the file is missing)."""
+    p = Path(__file__).with_name("styles.css")
+    return p.read_text(encoding="utf-8") if p.exists() else ""
+
+# Carrier page only: soft background behind H4/H5 titles and translucent panel cards
+_CARRIER_CSS = """
+h4, h5 {
+  display:inline-block;
+  background: rgba(255,255,255,0.85);
+  padding: 4px 8px;
+  border-radius: 8px;
+  margin-bottom: 8px;
+}
+[data-testid="stVerticalBlock"]:has(.panel-sentinel),
+[data-testid="stVerticalBlock"] [data-testid="stVerticalBlock"]:has(.panel-sentinel),
+[data-testid="stContainer"]:has(.panel-sentinel) {
+  background: rgba(255,255,255,0.80) !important;
+  border: 1px solid rgba(148,163,184,.35) !important;
+  border-radius: 12px !important;
+  box-shadow: 0 10px 24px rgba(0,0,0,.08) !important;
+  padding: 12px !important;
+  margin-bottom: 10px !important;
+  backdrop-filter: saturate(120%) blur(2px);
+}
+#left-ui { font-size: 0.92rem; }
+.block-container { padding-top: 14px !important; }
+"""
+
+# Each panel heading carries the .panel-sentinel marker, so a card costs one markdown element
+PANEL_HEADINGS = {
+    key: f'<div class="panel-sentinel"></div>\n\n#### {title}'
+    for key, title in (("strategic", "Strategic"), ("operational", "Operational"),
+                       ("service", "Service"), ("display", "Display options"))
+}
+# Button types for each tab pair, looked up by the active panel: (left tab, right tab)
+TAB_TYPES = {
+    "strategic": ("primary", "secondary"), "operational": ("secondary", "primary"),
+    "service": ("primary", "secondary"), "display": ("secondary", "primary"),
+}
+
+@st.cache_resource(show_spinner=False)
+def _static_css(page: str) -> str:
+    """<style> block with styles.css plus the page-specific rules, built once per process."""
+    css = load_styles()
+    if page == "carrier":
+        css += _CARRIER_CSS
+    return f"<style>{css}</style>"
+
+@st.cache_resource(show_spinner=False)
+def _page_style_html(page: str, bg_path: Optional[str], bg_mtime_ns: int) -> str:
+    """
+    Complete style markup for a page and its background image file, composed once per file version.
+    The URL is built here, so a multi-MB data: URI is never hashed as a cache key.
+    """
+    bg_uri = _background_url(bg_path, bg_mtime_ns) if bg_path else None
+    bg = _home_bg_css(bg_uri) if page == "home" else _carrier_bg_css(bg_uri)
+    return _static_css(page) + (bg or "")
+
+def apply_page_styles(page: str):
+    """All static CSS for a page (styles.css, page rules, background) as a single markdown element."""
+    # Only the image file is looked up per rerun; the markup changes when the file does
+    p = _find_image("background1" if page == "home" else "background2")
+    if p is None:
+        html = _page_style_html(page, None, 0)
+    else:
+        html = _page_style_html(page, str(p), p.stat().st_mtime_ns)
+    st.markdown(html, unsafe_allow_html=True)
@@ -1,12 +1,12 @@
 # app.py — Urban Freight Simulation Game (with Google Sheets player storage)
 
-from pathlib import Path
 from typing import Optional
 import math
-import altair as alt
+import numpy as np
 import pandas as pd
 import streamlit as st
-from base64 import b64encode
+import logging
+from logging.handlers import RotatingFileHandler
 
 # ---------- Streamlit page & styles ----------
 st.set_page_config(page_title="Urban Freight Simulation Game", layout="wide")
@@ -14,55 +14,34 @@ st.caption("🔧 Running app_pre_estimate v4 – players fix + debug")
 
 # -------- Google Sheets / Player persistence --------
 from datetime import datetime
-
-import gspread
-from google.oauth2.service_account import Credentials
-
-# Columns we store per player in Google Sheets
-PLAYER_FIELDS = [
-    "email",
-    "created_at",
-    "updated_at",
-    # Existing totals
-    "best_profit_one_year",
-    "best_profit_round_id",
-    "best_emission_one_year",
-    "best_emission_round_id",
-
-    # NEW: per-parcel metrics
-    "best_profit_per_parcel",
-    "best_emission_per_parcel",
-
-    # NEW: attributes of best PROFIT per parcel
-    "best_profit_Next_vs_standard_increase",
-    "best_profit_Same_vs_standard_increase",
-    "best_profit_Delivery_fee_small",
-    "best_profit_Delivery_fee_Medium",
-    "best_profit_Delivery_fee_Large",
-    "best_profit_Diesel_van_share",
-    "best_profit_Electic_van_share",
-    "best_profit_Micro_hub_with_bike",
-    "best_profit_Off_peak_delivery",
-    "best_profit_Signature",
-    "best_profit_redlivery",
-    "best_profit_Tracking",
-    "best_profit_Insurance",
-
-    # NEW: attributes of best EMISSION per parcel
-    "best_emission_Next_vs_standard_increase",
-    "best_emission_Same_vs_standard_increase",
-    "best_emission_Delivery_fee_small",
-    "best_emission_Delivery_fee_Medium",
-    "best_emission_Delivery_fee_Large",
-    "best_emission_Diesel_van_share",
-    "best_emission_Electic_van_share",
-    "best_emission_Micro_hub_with_bike",
-    "best_emission_Off_peak_delivery",
-    "best_emission_Signature",
-    "best_emission_redlivery",
-    "best_emission_Tracking",
-    "best_emission_Insurance",
-]
+import atexit
+import queue
+import threading
+
+# gspread / google-auth are imported inside the Sheets helpers: the home page never needs them
+# The players snapshot and the background writer live in players_store.py (no Streamlit there)
+import players_store
+from players_store import EMPTY_REC, PLAYER_FIELDS, as_float
+
+# Round inputs saved next to a new per-parcel best: field suffix -> latest_inputs key
+_BEST_ATTR_INPUTS = {
+    "Next_vs_standard_increase": "Next_day_delivery_increase",
+    "Same_vs_standard_increase": "Same_day_delivery_increase",
+    "Delivery_fee_small": "Delivery_fee_small",
+    "Delivery_fee_Medium": "Medium_parcels_delivery_fee",
+    "Delivery_fee_Large": "Large_parcels_delivery_fee",
+    "Diesel_van_share": "Share_of_diesel_vans",
+    "Electic_van_share": "Share_of_electric_vans",
+    "Micro_hub_with_bike": "Microhub_delivery",
+    "Off_peak_delivery": "Offpeak_delivery",
+    "Signature": "Signature_required",
+    "redlivery": "Redelivery",
+    "Tracking": "Tracking",
+    "Insurance": "Insurance",
+}
+_BEST_ATTR_INPUT_KEYS = list(_BEST_ATTR_INPUTS.values())
+_PROFIT_ATTR_MAP = {f"best_profit_{k}": v for k, v in _BEST_ATTR_INPUTS.items()}
+_EMISSION_ATTR_MAP = {f"best_emission_{k}": v for k, v in _BEST_ATTR_INPUTS.items()}
 
 # ---- Google Sheets helpers ----
 
@@ -78,9 +57,22 @@ def get_gspread_client():
     Build a gspread client from service-account credentials stored in st.secrets.
     st.secrets["gcp_service_account"] must contain the JSON of the service account.
     """
+    import gspread
+    from google.auth.transport.requests import AuthorizedSession
+    from google.oauth2.service_account import Credentials
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
     info = st.secrets["gcp_service_account"]  # dict, NOT a path
     creds = Credentials.from_service_account_info(info, scopes=SHEETS_SCOPES)
-    client = gspread.authorize(creds)
+
+    # One pooled session for every Sheets call: TLS connections are kept alive and reused.
+    # Idempotent requests back off and retry on 429/5xx; POST writes (append, batchUpdate)
+    # are not replayed, since a 5xx there may already have been applied.
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+    session = AuthorizedSession(creds)
+    session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=retry))
+    client = gspread.Client(auth=creds, session=session)
     return client
 
 
@@ -90,6 +82,8 @@ def get_players_worksheet():
     Open the spreadsheet defined in st.secrets["PLAYERS_SHEET_ID"] and
     ensure there is a 'players' worksheet with the right header.
     """
+    import gspread
+
     client = get_gspread_client()
     sheet_id = st.secrets["PLAYERS_SHEET_ID"]  # the spreadsheet ID (not the full URL)
     sh = client.open_by_key(sheet_id)
@@ -97,58 +91,56 @@ def get_players_worksheet():
     try:
         ws = sh.worksheet("players")
     except gspread.WorksheetNotFound:
-        # Create worksheet and header row
+        # Create worksheet and write the header straight into row 1 (nothing to verify after)
         ws = sh.add_worksheet(title="players", rows=1000, cols=len(PLAYER_FIELDS))
-        ws.append_row(PLAYER_FIELDS)
+        ws.update("A1", [PLAYER_FIELDS])
+        return ws
 
-    # Make sure header is correct (defensive)
+    # Existing sheet: make sure header is correct (defensive); runs once per process
     header = ws.row_values(1)
     if header != PLAYER_FIELDS:
         ws.update("A1", [PLAYER_FIELDS])
 
     return ws
 
-def _load_players_with_rows() -> dict:
-    """
-    Read all players from Google Sheets and return a dict:
-      { email_lower: {field: value, ..., "_row": sheet_row_number} }
 
-    Uses expected_headers=PLAYER_FIELDS so we don't crash if the
-    actual header row has duplicate labels or weird formatting.
+@st.cache_resource
+def _players_cache() -> dict:
     """
-    ws = get_players_worksheet()
+    Process-wide players snapshot shared by every session (see players_store.new_players_cache).
+    Held in cache_resource: module globals here are reset on each script rerun.
+    """
+    return players_store.new_players_cache()
 
-    # Use our own header definition to avoid "header row is not unique" errors
-    rows = ws.get_all_records(expected_headers=PLAYER_FIELDS)
 
-    players = {}
-    for idx, r in enumerate(rows, start=2):  # data starts at row 2
-        email_key = str(r.get("email", "")).strip().lower()
-        if not email_key:
-            continue
-        r["_row"] = idx
-        players[email_key] = r
-    return players
+def _load_players_with_rows() -> dict:
+    """Shared { email_lower: {field: value, ..., "_row": n} } snapshot (players_store.load_players)."""
+    return players_store.load_players(_players_cache(), get_players_worksheet())
 
-def load_players_leaderboard_df() -> pd.DataFrame:
+
+def _players_version() -> int:
+    """The snapshot's version, after re-reading Sheets if the snapshot is past its TTL."""
+    _load_players_with_rows()
+    cache = _players_cache()
+    with cache["lock"]:
+        return cache["version"]
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_players_leaderboard_df(write_version: int = 0) -> pd.DataFrame:
     """
     Load all players that have numeric best_*_per_parcel values
-    from Google Sheets into a DataFrame with columns:
+    from the players snapshot into a DataFrame with columns:
       email, profit_per, emission_per
-    """
-    ws = get_players_worksheet()
-    rows = ws.get_all_records(expected_headers=PLAYER_FIELDS)
 
+    Shared by all sessions and keyed only on write_version (_players_version()), which
+    changes on every refetch and every queued write, so it is never older than the snapshot.
+    """
     records = []
-    for r in rows:
-        email = str(r.get("email", "")).strip().lower()
-        if not email:
-            continue
-
-        try:
-            profit_per = float(r.get("best_profit_per_parcel", ""))
-            emis_per = float(r.get("best_emission_per_parcel", ""))
-        except Exception:
+    for email, r in _load_players_with_rows().items():
+        profit_per = as_float(r.get("best_profit_per_parcel"), None)
+        emis_per = as_float(r.get("best_emission_per_parcel"), None)
+        if profit_per is None or emis_per is None:
             # Skip rows that don't have valid per-parcel numbers yet
             continue
 
@@ -166,25 +158,35 @@ def load_players_leaderboard_df() -> pd.DataFrame:
     return pd.DataFrame(records)
 
 
-def _write_player_record(rec: dict):
+@st.cache_resource
+def _player_write_queue() -> "queue.Queue":
+    """Queue feeding the single daemon thread that talks to Sheets (started once per process)."""
+    # Resolved here, on the script thread: st.secrets and the cache_resource client are
+    # not used from the writer thread, which only gets the worksheet and snapshot objects
+    ws = get_players_worksheet()
+    cache = _players_cache()
+    q = queue.Queue()
+    threading.Thread(
+        target=players_store.player_writer_loop, args=(q, ws, cache), name="player-writer", daemon=True,
+    ).start()
+    # A clean shutdown (e.g. a redeploy) writes what is still batched instead of dropping it
+    atexit.register(players_store.flush_player_writes, q)
+    return q
+
+
+def _queue_player_write(rec: dict, dirty: Optional[dict] = None):
     """
-    Insert or update a single player record in Google Sheets.
-    The record must contain all PLAYER_FIELDS and optional '_row'.
+    Apply a player change to the shared snapshot now and send it to Sheets in the
+    background, so the rerun never waits on a Sheets round-trip. Failed writes are retried
+    with backoff; one that gives up is reported by player_write_failure().
     """
-    ws = get_players_worksheet()
-    players = _load_players_with_rows()
-    email_key = rec["email"].strip().lower()
-    existing = players.get(email_key)
+    players_store.queue_player_write(_player_write_queue(), _players_cache(), rec, dirty)
 
-    values = [rec.get(f, "") for f in PLAYER_FIELDS]
 
-    if existing and "_row" in existing:
-        row_num = existing["_row"]
-        # Update existing row starting from column A; width is inferred from values
-        ws.update(f"A{row_num}", [values])
-    else:
-        # Append new row
-        ws.append_row(values)
+def player_write_failure(email: str) -> Optional[str]:
+    """The error of a player write that gave up since the last call (then cleared), else None."""
+    return players_store.player_write_failure(_players_cache(), email)
+
 
 def get_or_create_player(email: str) -> dict:
     """
@@ -199,11 +201,11 @@ def get_or_create_player(email: str) -> dict:
         rec = players[email_key]
     else:
         # initialise all PLAYER_FIELDS as empty strings
-        rec = {f: "" for f in PLAYER_FIELDS}
+        rec = EMPTY_REC.copy()
         rec["email"] = email_key
         rec["created_at"] = now
         rec["updated_at"] = now
-        _write_player_record(rec)
+        _queue_player_write(rec)
 
     # return a copy without the internal row marker
     clean = {k: v for k, v in rec.items() if k != "_row"}
@@ -217,47 +219,39 @@ def update_player_best(
     emission_one_year: float,
     row: Optional[dict] = None,
     latest_inputs: Optional[pd.Series] = None,
-) -> bool:
+) -> dict:
     """
     Update:
       - highest profit (1Y total)
       - lowest emission (1Y total)
       - best profit/emission per parcel + their attributes
-    Returns True if something changed.
+    Returns the changed fields ({} if nothing changed).
     """
     email_key = email.strip().lower()
     players = _load_players_with_rows()
     now = datetime.utcnow().isoformat(timespec="seconds")
 
     if email_key in players:
-        rec = players[email_key]
+        rec = dict(players[email_key])
     else:
-        rec = {f: "" for f in PLAYER_FIELDS}
+        rec = EMPTY_REC.copy()
         rec["email"] = email_key
         rec["created_at"] = now
 
     changed = False
+    dirty = {}  # field -> new value; only these cells are written back
 
+    # Scores are stored as numbers rounded to 6 significant digits (as the old text cells were)
     # ---------- Existing: best TOTAL profit (1Y) ----------
-    try:
-        prev_profit = float(rec.get("best_profit_one_year", ""))
-    except Exception:
-        prev_profit = float("-inf")
-
-    if profit_one_year > prev_profit:
-        rec["best_profit_one_year"] = f"{profit_one_year:.6g}"
-        rec["best_profit_round_id"] = str(round_id)
+    if profit_one_year > as_float(rec.get("best_profit_one_year"), float("-inf")):
+        dirty["best_profit_one_year"] = float(f"{profit_one_year:.6g}")
+        dirty["best_profit_round_id"] = int(round_id)
         changed = True
 
     # ---------- Existing: best TOTAL emission (1Y) ----------
-    try:
-        prev_emis = float(rec.get("best_emission_one_year", ""))
-    except Exception:
-        prev_emis = float("inf")
-
-    if emission_one_year < prev_emis:
-        rec["best_emission_one_year"] = f"{emission_one_year:.6g}"
-        rec["best_emission_round_id"] = str(round_id)
+    if emission_one_year < as_float(rec.get("best_emission_one_year"), float("inf")):
+        dirty["best_emission_one_year"] = float(f"{emission_one_year:.6g}")
+        dirty["best_emission_round_id"] = int(round_id)
         changed = True
 
     # ---------- NEW: per-parcel metrics ----------
@@ -279,259 +273,111 @@ def update_player_best(
             profit_per = profit_one_year / demand_1y
             emis_per = emission_one_year / demand_1y
 
+    # Attribute values for either best, in _BEST_ATTR_INPUTS order (one reindex, "" if missing)
+    attr_values = ()
+    if latest_inputs is not None:
+        attr_values = latest_inputs.reindex(_BEST_ATTR_INPUT_KEYS, fill_value="").tolist()
+
     # ---- Best PROFIT per parcel + attributes ----
     if profit_per is not None:
-        try:
-            prev_profit_per = float(rec.get("best_profit_per_parcel", ""))
-        except Exception:
-            prev_profit_per = float("-inf")
-
-        if profit_per > prev_profit_per:
-            rec["best_profit_per_parcel"] = f"{profit_per:.6g}"
+        if profit_per > as_float(rec.get("best_profit_per_parcel"), float("-inf")):
+            dirty["best_profit_per_parcel"] = float(f"{profit_per:.6g}")
 
-            if latest_inputs is not None:
-                rec["best_profit_Next_vs_standard_increase"] = latest_inputs.get(
-                    "Next_day_delivery_increase", ""
-                )
-                rec["best_profit_Same_vs_standard_increase"] = latest_inputs.get(
-                    "Same_day_delivery_increase", ""
-                )
-                rec["best_profit_Delivery_fee_small"] = latest_inputs.get(
-                    "Delivery_fee_small", ""
-                )
-                rec["best_profit_Delivery_fee_Medium"] = latest_inputs.get(
-                    "Medium_parcels_delivery_fee", ""
-                )
-                rec["best_profit_Delivery_fee_Large"] = latest_inputs.get(
-                    "Large_parcels_delivery_fee", ""
-                )
-                rec["best_profit_Diesel_van_share"] = latest_inputs.get(
-                    "Share_of_diesel_vans", ""
-                )
-                rec["best_profit_Electic_van_share"] = latest_inputs.get(
-                    "Share_of_electric_vans", ""
-                )
-                rec["best_profit_Micro_hub_with_bike"] = latest_inputs.get(
-                    "Microhub_delivery", ""
-                )
-                rec["best_profit_Off_peak_delivery"] = latest_inputs.get(
-                    "Offpeak_delivery", ""
-                )
-                rec["best_profit_Signature"] = latest_inputs.get(
-                    "Signature_required", ""
-                )
-                rec["best_profit_redlivery"] = latest_inputs.get(
-                    "Redelivery", ""
-                )
-                rec["best_profit_Tracking"] = latest_inputs.get(
-                    "Tracking", ""
-                )
-                rec["best_profit_Insurance"] = latest_inputs.get(
-                    "Insurance", ""
-                )
+            dirty.update(zip(_PROFIT_ATTR_MAP, attr_values))
             changed = True
 
     # ---- Best EMISSION per parcel + attributes ----
     if emis_per is not None:
-        try:
-            prev_emis_per = float(rec.get("best_emission_per_parcel", ""))
-        except Exception:
-            prev_emis_per = float("inf")
-
-        if emis_per < prev_emis_per:
-            rec["best_emission_per_parcel"] = f"{emis_per:.6g}"
+        if emis_per < as_float(rec.get("best_emission_per_parcel"), float("inf")):
+            dirty["best_emission_per_parcel"] = float(f"{emis_per:.6g}")
 
-            if latest_inputs is not None:
-                rec["best_emission_Next_vs_standard_increase"] = latest_inputs.get(
-                    "Next_day_delivery_increase", ""
-                )
-                rec["best_emission_Same_vs_standard_increase"] = latest_inputs.get(
-                    "Same_day_delivery_increase", ""
-                )
-                rec["best_emission_Delivery_fee_small"] = latest_inputs.get(
-                    "Delivery_fee_small", ""
-                )
-                rec["best_emission_Delivery_fee_Medium"] = latest_inputs.get(
-                    "Medium_parcels_delivery_fee", ""
-                )
-                rec["best_emission_Delivery_fee_Large"] = latest_inputs.get(
-                    "Large_parcels_delivery_fee", ""
-                )
-                rec["best_emission_Diesel_van_share"] = latest_inputs.get(
-                    "Share_of_diesel_vans", ""
-                )
-                rec["best_emission_Electic_van_share"] = latest_inputs.get(
-                    "Share_of_electric_vans", ""
-                )
-                rec["best_emission_Micro_hub_with_bike"] = latest_inputs.get(
-                    "Microhub_delivery", ""
-                )
-                rec["best_emission_Off_peak_delivery"] = latest_inputs.get(
-                    "Offpeak_delivery", ""
-                )
-                rec["best_emission_Signature"] = latest_inputs.get(
-                    "Signature_required", ""
-                )
-                rec["best_emission_redlivery"] = latest_inputs.get(
-                    "Redelivery", ""
-                )
-                rec["best_emission_Tracking"] = latest_inputs.get(
-                    "Tracking", ""
-                )
-                rec["best_emission_Insurance"] = latest_inputs.get(
-                    "Insurance", ""
-                )
+            dirty.update(zip(_EMISSION_ATTR_MAP, attr_values))
             changed = True
 
     if changed:
-        rec["updated_at"] = now
-        _write_player_record(rec)
-
-        # 🔁 bump leaderboard refresh counter so cached data is reloaded
-        try:
-            import streamlit as st
-            st.session_state["leaderboard_refresh"] = (
-                st.session_state.get("leaderboard_refresh", 0) + 1
-            )
-        except Exception:
-            # If not in a Streamlit context, just ignore
-            pass
+        dirty["updated_at"] = now
+        rec.update(dirty)
+        # Bumps the snapshot version, so every session's leaderboard is rebuilt once
+        _queue_player_write(rec, dirty)
 
-    return changed
+    return dirty
 
 
-# ---------- Background helpers ----------
 
-def _data_uri_for(name_no_ext: str) -> Optional[str]:
-    """Return a data: URI for name_no_ext.(png|jpg|jpeg|webp) if present next to app.py."""
-    for ext in ("png", "jpg", "jpeg", "webp"):
-        p = Path(__file__).with_name(f"{name_no_ext}.{ext}")
-        if p.exists():
-            data = p.read_bytes()
-            b64 = b64encode(data).decode("ascii")
-            mime = "jpeg" if ext == "jpg" else ext
-            return f"data:image/{mime};base64,{b64}"
-    return None
+# ---------- Models / modules ----------
+# Model modules, compute and charts (matplotlib) are imported where they're used, so the
+# home page never pays for them
+from constants import COLUMNS
+# Session state, page styles and the cached compute path are shared with app.py
+from app_common import (
+    COL_IDX, PANEL_HEADINGS, TAB_TYPES, apply_page_styles, compute_round_cached, ensure_defaults,
+    get_ctx, inputs_series, load_shippers_geo_static, load_styles, reset_rounds, rounds_df,
+)
 
 
-def _apply_home_background():
-    uri = _data_uri_for("background1")
-    if not uri:
-        return
-    st.markdown(
-        f"""
-        <style>
-        [data-testid="stAppViewContainer"] {{
-          background: url("{uri}") no-repeat center center fixed;
-          background-size: cover;
-        }}
-        .block-container {{
-          background: transparent !important;
-          padding: 38px !important;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True,
+@st.cache_resource
+def load_models_static():
+    """Choice-model betas and scoring functions, loaded once per process."""
+    from Ship_choice_pre_estimate import (
+        run_shippers_choice_model,
+        calculate_probability_of_selecting_by_shippers,
+        calculate_probabilities_shippers_batch,
     )
-
-
-def _apply_carrier_background():
-    """Use background2.* if available for Carrier page."""
-    uri = _data_uri_for("background2")
-    if not uri:
-        st.markdown(
-            """
-            <style>
-            [data-testid="stAppViewContainer"] {
-              background: var(--background-color) !important;
-              background-size: auto !important;
-            }
-            .block-container { background: transparent !important; }
-            </style>
-            """,
-            unsafe_allow_html=True,
-        )
-        return
-    st.markdown(
-        f"""
-        <style>
-        [data-testid="stAppViewContainer"] {{
-          background: url("{uri}") no-repeat center center fixed !important;
-          background-size: cover !important;
-        }}
-        .block-container {{ background: transparent !important; }}
-        </style>
-        """,
-        unsafe_allow_html=True,
+    from Recip_choice_pre_estimate import (
+        run_recipients_choice_model,
+        calculate_probability_of_selecting_by_recipients,
+        calculate_probabilities_recipients_batch,
     )
 
+    try:
+        ship = run_shippers_choice_model(None)   # reads shippers_betas.json
+        recp = run_recipients_choice_model(None) # reads recipients_betas.json
+    except FileNotFoundError:
+        st.error("❌ Missing model files. Ensure shippers_betas.json and recipients_betas.json sit next to app.py.")
+        st.stop()
+    except Exception as e:
+        st.error("Failed to load model parameters.")
+        st.exception(e)
+        st.stop()
 
-def _ensure_defaults():
-    """Make sure all session_state keys exist before use."""
-    ss = st.session_state
-    # routing
-    ss.setdefault("page", "home")
-    # round/result state
-    ss.setdefault("current_round", 1)
-    ss.setdefault("rounds_results", pd.DataFrame())
-    ss.setdefault("hidden_rounds", [])
-    # panel selections
-    ss.setdefault("top_panel", "strategic")   # 'strategic' | 'operational'
-    ss.setdefault("bottom_panel", "service")  # 'service'   | 'display'
-    # strategic & operational controls
-    ss.setdefault("diesel_share", 60)
-    ss.setdefault("microhub_enabled", False)
-    ss.setdefault("fee_small", 7.0)
-    ss.setdefault("fee_medium", 10.0)
-    ss.setdefault("fee_large", 18.0)
-    ss.setdefault("next_day_inc", 0.20)
-    ss.setdefault("same_day_inc", 0.50)
-    ss.setdefault("offpeak", False)
-    ss.setdefault("redel", True)
-    ss.setdefault("tracking", True)
-    ss.setdefault("insurance", False)
-    ss.setdefault("signature", False)
-    # display options
-    ss.setdefault("show_2m", True)
-    ss.setdefault("show_1y", True)
-    ss.setdefault("show_5y", True)
-    # tour
-    ss.setdefault("tour_step", 0)
-
-
-# ---------- Models / modules ----------
-
-from Ship_choice_pre_estimate import (
-    run_shippers_choice_model,
-    calculate_probability_of_selecting_by_shippers,
-)
-from Recip_choice_pre_estimate import (
-    run_recipients_choice_model,
-    calculate_probability_of_selecting_by_recipients,
-)
+    return {
+        "shippers_beta_values": ship["beta_values"],
+        "recipients_beta_values": recp["beta_values"],
+        "shippers_beta_params": (ship["beta_vec"], ship["asc"]),
+        "recipients_beta_params": (recp["beta_vec"], recp["asc"]),
+        "calculate_probability_of_selecting_by_shippers": calculate_probability_of_selecting_by_shippers,
+        "calculate_probability_of_selecting_by_recipients": calculate_probability_of_selecting_by_recipients,
+        "calculate_probabilities_shippers_batch": calculate_probabilities_shippers_batch,
+        "calculate_probabilities_recipients_batch": calculate_probabilities_recipients_batch,
+    }
 
-from compute import compute_round_result
-from charts import render_charts_and_tables
-from constants import COLUMNS, init_environment
 
 # ---------- Streamlit page & styles ----------
-_css_path = Path(__file__).with_name("styles.css")
-if _css_path.exists():
-    st.markdown(f"<style>{_css_path.read_text(encoding='utf-8')}</style>", unsafe_allow_html=True)
-else:
+if not load_styles():
     st.warning("styles.css not found; falling back to default Streamlit styles.")
 
 
 # ---------- Router ----------
 
+# Used as on_click callbacks: Streamlit reruns right after a callback, so no st.rerun() here
 def go_home():
     st.session_state.page = "home"
-    st.rerun()
 
 
 def go_carrier():
     st.session_state.page = "carrier"
-    st.rerun()
+
+
+def enter_carrier():
+    """on_click for "Enter Carrier Game": check the email gate, register the player, route."""
+    email = st.session_state.get("gate_email", "")
+    if not email or "@" not in email:
+        st.session_state["gate_error"] = "Please enter a valid email address."
+        return
+    rec = get_or_create_player(email)
+    st.session_state["player_email"] = rec["email"]
+    st.session_state["player_record"] = rec  # the carrier caption reads this, not the sheet
+    go_carrier()
 
 
 # ---------- Tour helpers ----------
@@ -569,24 +415,51 @@ def tour_nav(prev_step: Optional[int], next_step: Optional[int]):
                 st.rerun()
 
 
+# Built once; tour_tip only fills in the fields
+_TOUR_TIP_TMPL = (
+    '<div class="tour-tip" style="max-width:{w}px">'
+    '<div class="tour-tip-title">{t}</div>'
+    '<div class="tour-tip-body">{b}{j}</div>'
+    "</div>"
+)
+_TOUR_JUMP_TMPL = ' <a href="#{}">Jump ↘</a>'
+
+
 def tour_tip(title: str, body: str, width_px: int = 320, anchor_id: Optional[str] = None):
-    jump = f' <a href="#{anchor_id}">Jump ↘</a>' if anchor_id else ""
+    jump = _TOUR_JUMP_TMPL.format(anchor_id) if anchor_id else ""
     st.markdown(
-        f"""
-        <div class="tour-tip" style="max-width:{width_px}px">
-            <div class="tour-tip-title">{title}</div>
-            <div class="tour-tip-body">{body}{jump}</div>
-        </div>
-        """,
+        _TOUR_TIP_TMPL.format(w=width_px, t=title, b=body, j=jump),
         unsafe_allow_html=True,
     )
 
 
 # ---------- Home ----------
 
+# Placeholder module cards share one template and are formatted once at import
+_MODULE_CARD_TMPL = (
+    '<div class="card module-card">'
+    '<div class="pilltitle">{icon} {title}</div>'
+    '<div class="sub">{desc}</div>'
+    '<div class="module-card-actions">'
+    '<button class="btn btn-disabled" disabled>Under development</button>'
+    "</div></div>"
+)
+_RECIPIENT_CARD_HTML = _MODULE_CARD_TMPL.format(
+    icon="🎯", title="Parcel Recipient",
+    desc="Evaluate delivery preferences, WTP, and service trade-offs.",
+)
+_MODULE_ROW_HTML = '<div class="module-row">{}</div>'.format("".join(
+    _MODULE_CARD_TMPL.format(icon=icon, title=title, desc=desc)
+    for icon, title, desc in (
+        ("🏪", "Shipper", "Choose carrier partnerships, pricing, and bundles to capture market share."),
+        ("🏛️", "Government", "Test policies (e.g., off-peak incentives, microhubs) and observe system-wide impacts."),
+    )
+))
+
+
 def render_home():
-    _ensure_defaults()
-    _apply_home_background()
+    ensure_defaults()
+    apply_page_styles("home")
     st.markdown('<div class="home-top-gap"></div>', unsafe_allow_html=True)
     left, right = st.columns([1, 2], gap="large")
 
@@ -631,18 +504,7 @@ def render_home():
 
         # Parcel Recipient (placeholder)
         with g1:
-            st.markdown(
-                """
-                <div class="card module-card">
-                  <div class="pilltitle">🎯 Parcel Recipient</div>
-                  <div class="sub">Evaluate delivery preferences, WTP, and service trade-offs.</div>
-                  <div class="module-card-actions">
-                    <button class="btn btn-disabled" disabled>Under development</button>
-                  </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
+            st.markdown(_RECIPIENT_CARD_HTML, unsafe_allow_html=True)
 
         # Carrier Game with email gate
         with g2:
@@ -656,66 +518,37 @@ def render_home():
                 unsafe_allow_html=True,
             )
 
-            email = st.text_input(
+            st.text_input(
                 "Enter your email to play",
                 key="gate_email",
                 placeholder="name@example.com",
             )
-            enter_clicked = st.button(
+            st.button(
                 "Enter Carrier Game",
                 key="btn_carrier",
                 type="primary",
                 use_container_width=True,
+                on_click=enter_carrier,
             )
 
-            if enter_clicked:
-                if not email or "@" not in email:
-                    st.error("Please enter a valid email address.")
-                else:
-                    rec = get_or_create_player(email)
-                    st.session_state["player_email"] = rec["email"]
-                    go_carrier()
+            gate_error = st.session_state.pop("gate_error", None)
+            if gate_error:
+                st.error(gate_error)
 
-            st.markdown("</div></div>", unsafe_allow_html=True)
+        # Shipper + Government cards: static HTML only, so one element for the whole row
+        st.markdown(_MODULE_ROW_HTML, unsafe_allow_html=True)
 
-        r2c1, r2c2 = st.columns(2, gap="large")
-        with r2c1:
-            st.markdown(
-                """
-                <div class="card module-card">
-                  <div class="pilltitle">🏪 Shipper</div>
-                  <div class="sub">Choose carrier partnerships, pricing, and bundles to capture market share.</div>
-                  <div class="module-card-actions">
-                    <button class="btn btn-disabled" disabled>Under development</button>
-                  </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-        with r2c2:
-            st.markdown(
-                """
-                <div class="card module-card">
-                  <div class="pilltitle">🏛️ Government</div>
-                  <div class="sub">Test policies (e.g., off-peak incentives, microhubs) and observe system-wide impacts.</div>
-                  <div class="module-card-actions">
-                    <button class="btn btn-disabled" disabled>Under development</button>
-                  </div>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
 
 def _get_current_player_point_from_rounds(player_email: str) -> Optional[dict]:
     """
     Compute current player's (profit_per, emission_per) from the latest round
-    in st.session_state.rounds_results, if possible.
+    in st.session_state.rounds_rows, if possible.
     """
-    df = st.session_state.get("rounds_results", pd.DataFrame())
-    if df.empty:
+    rows = st.session_state.get("rounds_rows", [])
+    if not rows:
         return None
 
-    last = df.iloc[-1]
+    last = rows[-1]
 
     try:
         if "Total_demand_one_year" in last:
@@ -745,13 +578,22 @@ def _get_current_player_point_from_rounds(player_email: str) -> Optional[dict]:
 # ---------- Carrier ----------
 
 def render_carrier():
-    _ensure_defaults()
-    _apply_carrier_background()
+    import altair as alt
+    from charts import render_charts_and_tables
+
+    ensure_defaults()
+    apply_page_styles("carrier")
 
     # Show player info if logged in
     player_email = st.session_state.get("player_email", "")
     if player_email:
-        rec = get_or_create_player(player_email)
+        failure = player_write_failure(player_email)
+        if failure is not None:
+            # The best shown so far never reached the sheet: show what is really stored
+            st.warning("Could not save your latest best score to the leaderboard.")
+            st.caption(f"Google Sheets error: {failure}")
+            st.session_state["player_record"] = get_or_create_player(player_email)
+        rec = st.session_state.get("player_record") or get_or_create_player(player_email)
         st.caption(
             f"Player: **{player_email}** | "
             f"Best profit per parcel: {rec.get('best_profit_per_parcel') or '—'} • "
@@ -760,63 +602,10 @@ def render_carrier():
     else:
         st.warning("⚠️ No email detected. Go back and enter your email to track your results.")
 
-    st.markdown(
-        """
-        <style>
-          h4, h5 {
-            display:inline-block;
-            background: rgba(255,255,255,0.85);
-            padding: 4px 8px;
-            border-radius: 8px;
-            margin-bottom: 8px;
-          }
-          [data-testid="stVerticalBlock"]:has(.panel-sentinel),
-          [data-testid="stVerticalBlock"] [data-testid="stVerticalBlock"]:has(.panel-sentinel),
-          [data-testid="stContainer"]:has(.panel-sentinel) {
-            background: rgba(255,255,255,0.80) !important;
-            border: 1px solid rgba(148,163,184,.35) !important;
-            border-radius: 12px !important;
-            box-shadow: 0 10px 24px rgba(0,0,0,.08) !important;
-            padding: 12px !important;
-            margin-bottom: 10px !important;
-            backdrop-filter: saturate(120%) blur(2px);
-          }
-          #left-ui { font-size: 0.92rem; }
-          .block-container { padding-top: 14px !important; }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
-
     st.button("← Back to main menu", on_click=go_home)
 
     # ----- Models & data (cached) -----
 
-    @st.cache_resource
-    def load_models_static():
-        try:
-            ship = run_shippers_choice_model(None)   # reads shippers_betas.json
-            recp = run_recipients_choice_model(None) # reads recipients_betas.json
-        except FileNotFoundError:
-            st.error("❌ Missing model files. Ensure shippers_betas.json and recipients_betas.json sit next to app.py.")
-            st.stop()
-        except Exception as e:
-            st.error("Failed to load model parameters.")
-            st.exception(e)
-            st.stop()
-
-        return {
-            "shippers_beta_values": ship["beta_values"],
-            "recipients_beta_values": recp["beta_values"],
-            "calculate_probability_of_selecting_by_shippers": calculate_probability_of_selecting_by_shippers,
-            "calculate_probability_of_selecting_by_recipients": calculate_probability_of_selecting_by_recipients,
-        }
-
-    @st.cache_resource
-    def load_shippers_geo_static():
-        csv_path = Path(__file__).with_name("shipper_data.csv")
-        return pd.read_csv(csv_path, delimiter=",")
-
     models = load_models_static()
     st.caption(
         f"Models loaded ✓ — {len(models['shippers_beta_values'])} shipper betas, "
@@ -824,7 +613,7 @@ def render_carrier():
     )
 
     shippers_geo = load_shippers_geo_static()
-    ctx = init_environment(shippers_geo)
+    ctx = get_ctx(shippers_geo)
 
     curr = st.session_state.current_round
 
@@ -835,145 +624,144 @@ def render_carrier():
     with dashboard:
         st.markdown('<div id="left-ui">', unsafe_allow_html=True)
 
-        # Tabs: Strategic / Operational
-        c1, c2 = st.columns(2, gap="small")
-        with c1:
-            if st.button(
-                "🎯 Strategic",
-                use_container_width=True,
-                type=("primary" if st.session_state.top_panel == "strategic" else "secondary"),
-            ):
-                st.session_state.top_panel = "strategic"
-        with c2:
-            if st.button(
-                "🛠️ Operational",
-                use_container_width=True,
-                type=("primary" if st.session_state.top_panel == "operational" else "secondary"),
-            ):
-                st.session_state.top_panel = "operational"
-
-        # Top panel content
-        top_panel = st.container()
-        with top_panel:
-            st.markdown('<div class="panel-sentinel"></div>', unsafe_allow_html=True)
-            st.markdown(f"#### {'Strategic' if st.session_state.top_panel=='strategic' else 'Operational'}")
-
-            if st.session_state.top_panel == "strategic":
-                colA, colB = st.columns(2, gap="small")
-                with colA:
-                    st.session_state.diesel_share = st.slider(
-                        "Diesel share (%)", 0, 100, st.session_state.diesel_share, 1
-                    )
-                with colB:
-                    st.session_state.microhub_enabled = st.checkbox(
-                        "Microhub delivery ⓘ",
-                        value=st.session_state.microhub_enabled,
-                        help="Vans to a microhub area; final addresses by (e-)cargo bikes.",
-                    )
-            else:
-                r1c1, r1c2 = st.columns(2, gap="small")
-                with r1c1:
-                    st.session_state.fee_small = st.slider(
-                        "Small (AUD)", 0.0, 20.0, st.session_state.fee_small, 0.5
-                    )
-                with r1c2:
-                    st.session_state.fee_medium = st.slider(
-                        "Medium (AUD)", 0.0, 20.0, st.session_state.fee_medium, 0.5
-                    )
-
-                r2c1, r2c2 = st.columns(2, gap="small")
-                with r2c1:
-                    st.session_state.fee_large = st.slider(
-                        "Large (AUD)", 0.0, 20.0, st.session_state.fee_large, 0.5
-                    )
-                with r2c2:
-                    st.session_state.next_day_inc = st.slider(
-                        "Next-day (× vs standard)", 0.0, 10.0,
-                        st.session_state.next_day_inc, 0.05,
-                    )
+        # One form for every round control: dragging sliders / flipping toggles no longer
+        # reruns the script; tab switches, Apply, Reset and Run submit the batch.
+        with st.form("carrier_form", border=False):
+            # Tabs: Strategic / Operational
+            strat_type, op_type = TAB_TYPES[st.session_state.top_panel]
+            c1, c2 = st.columns(2, gap="small")
+            with c1:
+                if st.form_submit_button(
+                    "🎯 Strategic",
+                    use_container_width=True,
+                    type=strat_type,
+                ):
+                    st.session_state.top_panel = "strategic"
+            with c2:
+                if st.form_submit_button(
+                    "🛠️ Operational",
+                    use_container_width=True,
+                    type=op_type,
+                ):
+                    st.session_state.top_panel = "operational"
+
+            # Top panel content
+            top_panel = st.container()
+            with top_panel:
+                st.markdown(PANEL_HEADINGS[st.session_state.top_panel], unsafe_allow_html=True)
+
+                if st.session_state.top_panel == "strategic":
+                    colA, colB = st.columns(2, gap="small")
+                    with colA:
+                        st.session_state.diesel_share = st.slider(
+                            "Diesel share (%)", 0, 100, st.session_state.diesel_share, 1
+                        )
+                    with colB:
+                        st.session_state.microhub_enabled = st.checkbox(
+                            "Microhub delivery ⓘ",
+                            value=st.session_state.microhub_enabled,
+                            help="Vans to a microhub area; final addresses by (e-)cargo bikes.",
+                        )
+                else:
+                    r1c1, r1c2 = st.columns(2, gap="small")
+                    with r1c1:
+                        st.session_state.fee_small = st.slider(
+                            "Small (AUD)", 0.0, 20.0, st.session_state.fee_small, 0.5
+                        )
+                    with r1c2:
+                        st.session_state.fee_medium = st.slider(
+                            "Medium (AUD)", 0.0, 20.0, st.session_state.fee_medium, 0.5
+                        )
 
-                r3c1, r3c2 = st.columns(2, gap="small")
-                with r3c1:
-                    st.session_state.same_day_inc = st.slider(
-                        "Same-day (× vs standard)", 0.0, 10.0,
-                        st.session_state.same_day_inc, 0.05,
-                    )
-                with r3c2:
-                    st.markdown("&nbsp;")
-
-        # Bottom tabs: Service / Display
-        c3, c4 = st.columns(2, gap="small")
-        with c3:
-            if st.button(
-                "📦 Service",
-                use_container_width=True,
-                type=("primary" if st.session_state.bottom_panel == "service" else "secondary"),
-            ):
-                st.session_state.bottom_panel = "service"
-        with c4:
-            if st.button(
-                "📊 Display",
-                use_container_width=True,
-                type=("primary" if st.session_state.bottom_panel == "display" else "secondary"),
-            ):
-                st.session_state.bottom_panel = "display"
+                    r2c1, r2c2 = st.columns(2, gap="small")
+                    with r2c1:
+                        st.session_state.fee_large = st.slider(
+                            "Large (AUD)", 0.0, 20.0, st.session_state.fee_large, 0.5
+                        )
+                    with r2c2:
+                        st.session_state.next_day_inc = st.slider(
+                            "Next-day (× vs standard)", 0.0, 10.0,
+                            st.session_state.next_day_inc, 0.05,
+                        )
 
-        # Bottom panel content
-        bottom_panel = st.container()
-        with bottom_panel:
-            st.markdown('<div class="panel-sentinel"></div>', unsafe_allow_html=True)
-            st.markdown(f"#### {'Service' if st.session_state.bottom_panel=='service' else 'Display options'}")
-
-            if st.session_state.bottom_panel == "service":
-                s1, s2 = st.columns(2, gap="small")
-                with s1:
-                    st.session_state.offpeak = st.toggle("Off-peak", value=st.session_state.offpeak)
-                with s2:
-                    st.session_state.redel = st.toggle("Redelivery", value=st.session_state.redel)
-
-                s3, s4 = st.columns(2, gap="small")
-                with s3:
-                    st.session_state.tracking = st.toggle("Tracking", value=st.session_state.tracking)
-                with s4:
-                    st.session_state.insurance = st.toggle("Insurance", value=st.session_state.insurance)
-
-                s5, _ = st.columns(2, gap="small")
-                with s5:
-                    st.session_state.signature = st.toggle("Signature", value=st.session_state.signature)
-            else:
-                d1, d2 = st.columns(2, gap="small")
-                with d1:
-                    st.session_state.show_2m = st.checkbox(
-                        "2M (two months)", value=st.session_state.show_2m
-                    )
-                with d2:
-                    st.session_state.show_1y = st.checkbox(
-                        "1Y (one year)", value=st.session_state.show_1y
-                    )
+                    r3c1, r3c2 = st.columns(2, gap="small")
+                    with r3c1:
+                        st.session_state.same_day_inc = st.slider(
+                            "Same-day (× vs standard)", 0.0, 10.0,
+                            st.session_state.same_day_inc, 0.05,
+                        )
+                    with r3c2:
+                        st.markdown("&nbsp;")
+
+            # Bottom tabs: Service / Display
+            service_type, display_type = TAB_TYPES[st.session_state.bottom_panel]
+            c3, c4 = st.columns(2, gap="small")
+            with c3:
+                if st.form_submit_button(
+                    "📦 Service",
+                    use_container_width=True,
+                    type=service_type,
+                ):
+                    st.session_state.bottom_panel = "service"
+            with c4:
+                if st.form_submit_button(
+                    "📊 Display",
+                    use_container_width=True,
+                    type=display_type,
+                ):
+                    st.session_state.bottom_panel = "display"
+
+            # Bottom panel content
+            bottom_panel = st.container()
+            with bottom_panel:
+                st.markdown(PANEL_HEADINGS[st.session_state.bottom_panel], unsafe_allow_html=True)
+
+                if st.session_state.bottom_panel == "service":
+                    s1, s2 = st.columns(2, gap="small")
+                    with s1:
+                        st.session_state.offpeak = st.toggle("Off-peak", value=st.session_state.offpeak)
+                    with s2:
+                        st.session_state.redel = st.toggle("Redelivery", value=st.session_state.redel)
+
+                    s3, s4 = st.columns(2, gap="small")
+                    with s3:
+                        st.session_state.tracking = st.toggle("Tracking", value=st.session_state.tracking)
+                    with s4:
+                        st.session_state.insurance = st.toggle("Insurance", value=st.session_state.insurance)
+
+                    s5, _ = st.columns(2, gap="small")
+                    with s5:
+                        st.session_state.signature = st.toggle("Signature", value=st.session_state.signature)
+                else:
+                    d1, d2 = st.columns(2, gap="small")
+                    with d1:
+                        st.session_state.show_2m = st.checkbox(
+                            "2M (two months)", value=st.session_state.show_2m
+                        )
+                    with d2:
+                        st.session_state.show_1y = st.checkbox(
+                            "1Y (one year)", value=st.session_state.show_1y
+                        )
 
-                d3, _ = st.columns(2, gap="small")
-                with d3:
-                    st.session_state.show_5y = st.checkbox(
-                        "5Y (five years)", value=st.session_state.show_5y
-                    )
+                    d3, _ = st.columns(2, gap="small")
+                    with d3:
+                        st.session_state.show_5y = st.checkbox(
+                            "5Y (five years)", value=st.session_state.show_5y
+                        )
 
-                with st.expander("More display controls", expanded=False):
-                    all_round_ids = (
-                        st.session_state.rounds_results["Round ID"].astype(int).tolist()
-                        if not st.session_state.rounds_results.empty
-                        else []
-                    )
-                    st.session_state.hidden_rounds = st.multiselect(
-                        "Hide rounds from display (non-destructive)",
-                        options=all_round_ids,
-                        default=st.session_state.hidden_rounds,
-                        placeholder="Select Round IDs to hide…",
-                    )
+                    with st.expander("More display controls", expanded=False):
+                        st.session_state.hidden_rounds = st.multiselect(
+                            "Hide rounds from display (non-destructive)",
+                            options=st.session_state.round_ids,
+                            default=st.session_state.hidden_rounds,
+                            placeholder="Select Round IDs to hide…",
+                        )
+                    st.form_submit_button("Apply display options", use_container_width=True)
 
-        # Reset / Run buttons
-        b1, b2 = st.columns(2, gap="small")
-        reset_clicked = b1.button("Reset", use_container_width=True)
-        run_clicked = b2.button("Run this round", type="primary", use_container_width=True)
+            # Reset / Run buttons
+            b1, b2 = st.columns(2, gap="small")
+            reset_clicked = b1.form_submit_button("Reset", use_container_width=True)
+            run_clicked = b2.form_submit_button("Run this round", type="primary", use_container_width=True)
 
         # Tour button
         tour_box = st.container()
@@ -1009,49 +797,46 @@ def render_carrier():
     # ===== Reset / Run logic =====
     latest_inputs_series = None
     if reset_clicked:
-        st.session_state.current_round = 1
-        st.session_state.rounds_results = pd.DataFrame()
-        st.session_state.hidden_rounds = []
+        reset_rounds()
         st.rerun()
 
     if run_clicked:
-        latest_inputs_series = pd.Series(
-            {
-                "Next_day_delivery_increase": float(next_day_inc),
-                "Same_day_delivery_increase": float(same_day_inc),
-                "Delivery_fee_small": float(fee_small),
-                "Medium_parcels_delivery_fee": float(fee_medium),
-                "Large_parcels_delivery_fee": float(fee_large),
-                "Share_of_diesel_vans": float(diesel_share),
-                "Share_of_electric_vans": float(100 - diesel_share),
-                "Microhub_delivery": int(microhub_enabled),
-                "Offpeak_delivery": int(offpeak),
-                "Signature_required": int(signature),
-                "Redelivery": int(redel),
-                "Tracking": int(tracking),
-                "Insurance": int(insurance),
-            }
-        )[COLUMNS]
+        inputs = np.empty(len(COLUMNS), dtype=np.float64)
+        inputs[COL_IDX["Next_day_delivery_increase"]] = next_day_inc
+        inputs[COL_IDX["Same_day_delivery_increase"]] = same_day_inc
+        inputs[COL_IDX["Delivery_fee_small"]] = fee_small
+        inputs[COL_IDX["Medium_parcels_delivery_fee"]] = fee_medium
+        inputs[COL_IDX["Large_parcels_delivery_fee"]] = fee_large
+        inputs[COL_IDX["Share_of_diesel_vans"]] = diesel_share
+        inputs[COL_IDX["Share_of_electric_vans"]] = 100 - diesel_share
+        inputs[COL_IDX["Microhub_delivery"]] = int(microhub_enabled)
+        inputs[COL_IDX["Offpeak_delivery"]] = int(offpeak)
+        inputs[COL_IDX["Signature_required"]] = int(signature)
+        inputs[COL_IDX["Redelivery"]] = int(redel)
+        inputs[COL_IDX["Tracking"]] = int(tracking)
+        inputs[COL_IDX["Insurance"]] = int(insurance)
+        latest_inputs_series = inputs_series(inputs)
 
         try:
-            row = compute_round_result(curr, latest_inputs_series, COLUMNS, models, ctx)
+            row = compute_round_cached(
+                tuple(inputs.tolist()), tuple(COLUMNS), models, ctx
+            )
+            row["Round ID"] = curr  # st.cache_data hands back a fresh copy per call
         except Exception as e:
             st.error(f"Round {curr} failed to compute.")
             st.exception(e)
             row = None
 
         if row is not None:
-            st.session_state.rounds_results = pd.concat(
-                [st.session_state.rounds_results, pd.DataFrame([row])],
-                ignore_index=True,
-            )
+            st.session_state.rounds_rows.append(row)
+            st.session_state.round_ids.append(curr)
             st.session_state.current_round = curr + 1
             st.success(f"Round {curr} appended.")
 
             # --- Update best profit / emission (totals + per parcel + attributes) ---
             if player_email:
                 try:
-                    update_player_best(
+                    changed = update_player_best(
                         player_email,
                         round_id=int(row["Round ID"]),
                         profit_one_year=float(row["Total_profit_one_year"]),
@@ -1059,6 +844,8 @@ def render_carrier():
                         row=row,
                         latest_inputs=latest_inputs_series,
                     )
+                    if changed and "player_record" in st.session_state:
+                        st.session_state["player_record"].update(changed)
                 except Exception as e:
                     st.warning("Could not update player leaderboard.")
                     st.exception(e)
@@ -1066,10 +853,10 @@ def render_carrier():
     # ===== RIGHT: charts + tables =====
     with main:
         render_charts_and_tables(
-            st.session_state.rounds_results.copy(), latest_inputs_series, curr
+            rounds_df(), latest_inputs_series, curr
         )
 
-        if not st.session_state.rounds_results.empty:
+        if st.session_state.rounds_rows:
             if tour_step_is(3):
                 tour_tip(
                     "Profit charts",
@@ -1107,8 +894,7 @@ def render_carrier():
                 st.info("Enter the game with an email to see your position on the leaderboard.")
             else:
                 try:
-                    refresh_key = st.session_state.get("leaderboard_refresh", 0)
-                    df_players = load_players_leaderboard_df()
+                    df_players = load_players_leaderboard_df(_players_version())
                 except Exception as e:
                     st.warning("Could not load leaderboard data from Google Sheets.")
                     st.exception(e)
@@ -1122,8 +908,7 @@ def render_carrier():
                 if df_players.empty and cur_point is None:
                     st.info("No leaderboard data yet. Run at least one round so results can be stored.")
                 else:
-                    # Work on a copy
-                    df_players = df_players.copy()
+                    # st.cache_data already hands back a private copy, safe to modify
                     df_players["email_key"] = df_players["email"].str.lower()
                     current_key = player_email.strip().lower()
                 
@@ -1258,16 +1043,25 @@ def render_carrier():
 
 # ---------- Seatbelt ----------
 
+# The logger outlives script reruns, so the handler is attached only once per process.
+# The file is opened on the first error and rotated at 1 MB (3 backups kept).
+_logger = logging.getLogger("urban_freight")
+if not _logger.handlers:
+    _log_handler = RotatingFileHandler(
+        "streamlit_error.log", maxBytes=1_000_000, backupCount=3, encoding="utf-8", delay=True
+    )
+    _log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    _logger.addHandler(_log_handler)
+    _logger.propagate = False
+
+
 def safe_render(fn):
     try:
         fn()
     except Exception as e:
-        import traceback
-
         st.error("⚠️ Something went wrong, but the app is still running.")
         st.exception(e)
-        with open("streamlit_error.log", "a", encoding="utf-8") as f:
-            f.write("\n\n" + traceback.format_exc())
+        _logger.exception("render failed")
 
 
 # ---------- Render ----------
@@ -1,162 +1,354 @@
 # charts.py — plots + tables with anchors for guided tour
-import matplotlib
-matplotlib.use("Agg")  # headless backend for Streamlit Cloud
-import matplotlib.pyplot as plt
-
-# import matplotlib.pyplot as plt
-from matplotlib.ticker import MaxNLocator, ScalarFormatter
+import hashlib
+import io
+import threading
 import pandas as pd
 import streamlit as st
 import numpy as np
 
+try:  # optional: several times faster than hashlib for the upload fingerprint
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:  # optional: parses uploaded CSVs in native code; the C engine otherwise
+    import pyarrow  # noqa: F401
+    _CSV_ENGINE = "pyarrow"
+except ImportError:
+    _CSV_ENGINE = "c"
+
 # Needed for validating uploads (Round ID + chart columns)
 from constants import COLUMNS
 
-
-def _apply_scientific(ax):
+# Plotted horizons as (label, marker, column suffix), and the columns the charts read
+_HORIZONS = (("2M", "o", "two_months"), ("1Y", "s", "one_year"), ("5Y", "D", "five_year"))
+_CHART_COLS = ("Round ID",) + tuple(
+    f"Total_{kind}_{suffix}" for kind in ("profit", "emission", "demand") for _, _, suffix in _HORIZONS
+)
+
+# Outputs table formats: totals to 2 dp, probabilities to 3 dp, Round ID as an integer
+_OUTPUT_COLUMN_CONFIG = {
+    "Round ID": st.column_config.NumberColumn(format="%d"),
+    "Shipper_Probability": st.column_config.NumberColumn(format="%.3f"),
+    "Recipient_Probability": st.column_config.NumberColumn(format="%.3f"),
+    **{
+        f"Total_{kind}{suffix}": st.column_config.NumberColumn(format="%.2f")
+        for kind in ("costs", "revenue", "emission", "profit", "demand")
+        for suffix in ("", "_two_months", "_one_year", "_five_year")
+    },
+}
+
+# Inputs table: plain numbers, so levers read 0/1 and fees/shares without trailing zeros
+_INPUT_COLUMN_CONFIG = {"Value": st.column_config.NumberColumn(format="%g")}
+
+# Outputs table dtypes narrowed for display only (see _display_frame)
+_DISPLAY_DTYPES = {"Round ID": "int32", "Shipper_Probability": "float32", "Recipient_Probability": "float32"}
+
+# Schema of an exported rounds CSV (compute's result row), so an upload parses straight into
+# these dtypes: ids and on/off levers as integers (nullable, a blank cell is NA), the rest float64
+_UPLOAD_INT_COLS = ("Round ID", "Micro_hub_with_bike", "Off_peak_delivery", "Signature", "redlivery",
+                    "Tracking", "Insurance", "Micro Hub Delivery", "Redelivery")
+_UPLOAD_FLOAT_COLS = (
+    "Next_vs_standard_increase", "Same_vs_standard_increase", "Delivery_fee_small", "Delivery_fee_Medium",
+    "Delivery_fee_Large", "Diesel_van_share", "Electic_van_share", "Shipper_Probability", "Recipient_Probability",
+    *(f"Total_{kind}{suffix}" for kind in ("costs", "revenue", "emission", "profit", "demand")
+      for suffix in ("", "_two_months", "_one_year", "_five_year")),
+)
+_UPLOAD_DTYPES = {**{c: "Int64" for c in _UPLOAD_INT_COLS}, **{c: "float64" for c in _UPLOAD_FLOAT_COLS}}
+
+# Chart rcParams, applied with matplotlib.rc_context around each figure build and draw
+_RC_CTX = {
+    # Fonts & sizes — Times New Roman everywhere
+    "font.family": "Times New Roman",
+    "font.size": 8,
+    "axes.titlesize": 9,
+    "axes.labelsize": 8,
+    "xtick.labelsize": 7,
+    "ytick.labelsize": 7,
+    "legend.fontsize": 7,
+    # Line aesthetics / resolution
+    "lines.linewidth": 2.0,
+    "lines.markersize": 4,
+    "figure.dpi": 160,  # higher resolution
+}
+
+
+def _sci_formatter():
     """Scientific y-axis labels so numbers stay compact."""
-    ax.ticklabel_format(style="sci", axis="y", scilimits=(0, 0), useMathText=True)
+    from matplotlib.ticker import ScalarFormatter
     sf = ScalarFormatter(useMathText=True)
     sf.set_scientific(True)
     sf.set_powerlimits((0, 0))
-    ax.yaxis.set_major_formatter(sf)
+    return sf
+
+@st.cache_resource(show_spinner=False)
+def _chart_figure() -> dict:
+    """
+    The one figure every _charts_png miss draws on (axes are cleared, not rebuilt, per draw).
+    Shared by all sessions, so draws are serialised by the lock.
+    """
+    # matplotlib (~200 ms to import) is only needed once a chart is actually drawn.
+    # A bare Figure on the Agg canvas: headless, and kept out of pyplot's figure registry
+    import matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    with matplotlib.rc_context(_RC_CTX):
+        fig = Figure(figsize=(8.0, 2.6))
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(1, 2)
+    fig.subplots_adjust(left=0.08, right=0.95, bottom=0.22, top=0.88, wspace=0.5)
+    # One formatter per axis (a formatter tracks the axis it labels, so they can't be shared);
+    # built once here and re-attached after each cla() instead of rebuilt per draw
+    formatters = tuple(_sci_formatter() for _ in axes)
+    return {"fig": fig, "axes": axes, "formatters": formatters, "lock": threading.Lock()}
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _charts_png(x: tuple, xticks_vals: tuple, profit_lines: tuple, emission_lines: tuple) -> bytes:
+    """
+    Profit/emission-per-parcel figure as PNG bytes. Arguments are plain tuples, so sessions
+    plotting the same data and horizons share the image (called via _chart_png only).
+    The bytes are immutable, so a hit hands back the stored object rather than a copy.
+    profit_lines / emission_lines: ((label, marker, y_values), ...) in plotting order.
+    """
+    import matplotlib
+
+    chart = _chart_figure()
+    with chart["lock"], matplotlib.rc_context(_RC_CTX):
+        fig, axes = chart["fig"], chart["axes"]
+        for ax in axes:
+            ax.cla()
+
+        def prettify(ax, formatter, title, ylab):
+            ax.set_title(title)
+            ax.set_xlabel("Round")
+            ax.set_ylabel(ylab)
+            ax.grid(True, which="major", linewidth=0.6, alpha=0.35)
+            ax.set_xticks(xticks_vals)  # fixed integer ticks, one per round
+            if xticks_vals:
+                ax.set_xlim(min(xticks_vals) - 0.5, max(xticks_vals) + 0.5)
+            ax.spines[:].set(linewidth=0.8, alpha=0.6)
+            ax.yaxis.set_major_formatter(formatter)
+
+        # Profit per parcel (left), emissions per parcel (right)
+        for ax, formatter, lines, title, ylab in (
+            (axes[0], chart["formatters"][0], profit_lines, "Profit per parcel", "AUD / parcel"),
+            (axes[1], chart["formatters"][1], emission_lines, "Emissions per parcel", "Cost / parcel (proxy)"),
+        ):
+            for label, marker, y in lines:
+                ax.plot(x, y, marker=marker, label=label)
+            prettify(ax, formatter, title, ylab)
+            if lines:
+                ax.legend(loc="best", frameon=False)
+
+        # Same savefig options st.pyplot uses, so the image looks unchanged
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=200, bbox_inches="tight")
+    return buf.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _chart_series(cols: tuple, rows: tuple, flags: tuple) -> tuple:
+    """
+    Per-parcel chart series for the displayed rounds, in _charts_png's argument form.
+    rows: one tuple per round in `cols` order; flags: (show_2m, show_1y, show_5y).
+    Returns (x, xticks_vals, profit_lines, emission_lines).
+    """
+    data = pd.DataFrame(list(rows), columns=list(cols))
+    # Round IDs are unique (merged by id on upload, one per Run) and arrive sorted,
+    # so the x values double as the tick positions
+    x = tuple(data["Round ID"].astype(int).tolist())
+    xticks_vals = x
+
+    # Per-parcel series for the horizons switched on, as (label, marker, values); a series
+    # is skipped when its total or demand column is missing (e.g. an older uploaded CSV)
+    profit_lines, emission_lines = [], []
+    active = [
+        (lines, label, marker, f"Total_{kind}_{suffix}", f"Total_demand_{suffix}")
+        for show, (label, marker, suffix) in zip(flags, _HORIZONS) if show
+        for kind, lines in (("profit", profit_lines), ("emission", emission_lines))
+        if f"Total_{kind}_{suffix}" in data.columns and f"Total_demand_{suffix}" in data.columns
+    ]
+    if active:
+        # Every series in one (series, rounds) divide; a zero demand plots as a gap.
+        # Rows are numeric already (computed, or coerced on upload), so each matrix is one
+        # cast; float32 is ample for plotted values (stored rounds stay float64 for tables/CSV)
+        num = data[[a[3] for a in active]].to_numpy(dtype=np.float32).T
+        den = data[[a[4] for a in active]].to_numpy(dtype=np.float32).T
+        ratios = np.divide(num, den, out=np.full_like(num, np.nan), where=den != 0)
+        for (lines, label, marker, _, _), y in zip(active, ratios.tolist()):
+            lines.append((label, marker, tuple(y)))
+    return x, xticks_vals, tuple(profit_lines), tuple(emission_lines)
+
+def _session_memo(name: str, objs: tuple, vals: tuple, build):
+    """
+    build(), kept in st.session_state[name] while the objects in `objs` are the same ones
+    (`is`) and `vals` compare equal. rounds_df() hands back the same frame until rounds are
+    added or replaced, so that identity is a cheap rounds version: no frame is hashed per
+    rerun, and only the latest frame is held (the entry is replaced on the next change).
+    """
+    cached = st.session_state.get(name)
+    if cached is None or cached[1] != vals or any(a is not b for a, b in zip(cached[0], objs)):
+        cached = (objs, vals, build())
+        st.session_state[name] = cached
+    return cached[2]
+
+def _displayed_rounds(rounds_data_all: pd.DataFrame, hidden: frozenset) -> pd.DataFrame:
+    """The rounds in Round ID order without the hidden ones; the caller's frame is never modified."""
+    # Rounds are appended in order; only an out-of-order upload needs the (copying) sort
+    if not rounds_data_all["Round ID"].is_monotonic_increasing:
+        rounds_data_all = rounds_data_all.sort_values("Round ID")
+    if not hidden:
+        return rounds_data_all
+    return rounds_data_all[~rounds_data_all["Round ID"].astype(int).isin(hidden)]
+
+def _chart_png(rounds_data: pd.DataFrame, flags: tuple):
+    """
+    PNG of the per-parcel charts for the displayed rounds, or None when no horizon is on.
+    Called only when the rounds version or flags change (see _session_memo); the shared
+    caches behind it then let sessions with the same data reuse each other's series/image.
+    """
+    cols = tuple(c for c in _CHART_COLS if c in rounds_data.columns)
+    rows = tuple(zip(*(rounds_data[c].tolist() for c in cols)))
+    x, xticks_vals, profit_lines, emission_lines = _chart_series(cols, rows, flags)
+    if not (profit_lines or emission_lines):
+        return None
+    return _charts_png(x, xticks_vals, profit_lines, emission_lines)
+
+def _csv_bytes(rounds_data: pd.DataFrame) -> bytes:
+    """Displayed rounds as CSV for the download button."""
+    return rounds_data.to_csv(index=False).encode("utf-8")
+
+def _display_frame(rounds_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Narrow copy of the rounds for st.dataframe (less Arrow to encode and ship each rerun).
+    Only columns whose display format hides the lost precision are narrowed: Round ID to
+    int32 and the %.3f probabilities to float32. Total_* stay float64 (five-year totals reach
+    ~1e7, past float32's cents) and so do the unformatted inputs. The caller's frame, and so
+    the CSV export, is untouched.
+    """
+    narrow = {c: dtype for c, dtype in _DISPLAY_DTYPES.items() if c in rounds_data.columns}
+    return rounds_data.astype(narrow) if narrow else rounds_data
+
+def _upload_fingerprint(data: bytes) -> str:
+    """Digest that spots re-uploads of the same file (dedupe only, so speed beats crypto strength)."""
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(len(data).to_bytes(8, "little"))
+    h.update(data)
+    return h.hexdigest()
+
+@st.fragment
+def _rounds_io(rounds_data: pd.DataFrame):
+    """
+    Download / upload controls under the outputs table. As a fragment, picking a file or
+    clicking Download reruns only this block, not the whole carrier page.
+    """
+    st.download_button(
+        "Download CSV (displayed)",
+        # Encoded once per displayed table, not on every rerun of the page or this fragment
+        data=_session_memo("_csv_bytes_cache", (rounds_data,), (), lambda: _csv_bytes(rounds_data)),
+        file_name="carrier_game_results_display.csv",
+        mime="text/csv",
+        use_container_width=True,
+    )
+
+    st.markdown("### 🔼 Upload previous rounds")
+    uploaded_file = st.file_uploader(
+        "Upload a CSV of previous rounds (exported earlier from this app)",
+        type=["csv"],
+        key="round_upload"
+    )
+
+    imported = False
+    if uploaded_file is not None:
+        try:
+            file_hash = _upload_fingerprint(uploaded_file.getvalue())
+
+            last_hash = st.session_state.get("last_uploaded_rounds_hash")
+            if last_hash != file_hash:
+                # Typed while parsing; a non-numeric cell in a known column fails the import
+                uploaded_df = pd.read_csv(uploaded_file, engine=_CSV_ENGINE, dtype=_UPLOAD_DTYPES)
+
+                required_for_charts = [
+                    "Round ID",
+                    "Total_profit_two_months", "Total_profit_one_year", "Total_profit_five_year",
+                    "Total_emission_two_months", "Total_emission_one_year", "Total_emission_five_year",
+                ]
+                missing = [c for c in required_for_charts if c not in uploaded_df.columns]
+                if missing:
+                    st.error(f"❌ Uploaded CSV is missing required columns for charts: {missing}")
+                else:
+                    # Round history is kept as a list of row dicts (see app_common.rounds_df);
+                    # merge by Round ID in one pass, uploaded rows replacing existing ones
+                    merged = dict(zip(st.session_state.round_ids, st.session_state.rounds_rows))
+                    merged.update(
+                        (int(r["Round ID"]), r)
+                        for r in uploaded_df.to_dict("records")
+                        if r["Round ID"] is not None  # blank ids (NA -> None here) skipped without a dropna() copy
+                    )
+                    round_ids = sorted(merged)
+                    st.session_state.rounds_rows = [merged[k] for k in round_ids]
+                    st.session_state.round_ids = round_ids
+
+                    if round_ids:
+                        st.session_state.current_round = round_ids[-1] + 1
+
+                    st.session_state["last_uploaded_rounds_hash"] = file_hash
+                    st.session_state["rounds_upload_notice"] = (
+                        f"✅ Imported {len(uploaded_df)} rows. Charts above are now using them."
+                    )
+                    imported = True
+            else:
+                notice = st.session_state.pop("rounds_upload_notice", None)
+                if notice:
+                    st.success(notice)
+                else:
+                    st.info("This file was already processed. Pick a different file to re-import.")
+        except Exception as e:
+            st.error(f"⚠️ Failed to read uploaded file: {e}")
+
+    # The charts and tables outside this fragment only see the new rows on a full rerun
+    if imported:
+        st.rerun()
 
 def render_charts_and_tables(rounds_data_all: pd.DataFrame, latest_inputs_series, curr: int):
     if rounds_data_all.empty:
         st.info("Run a round to populate charts.")
         return
 
-    rounds_data_all = rounds_data_all.sort_values("Round ID")
-
     # ---- Read display settings from the left “Display” panel ----
     show_2m = st.session_state.get("show_2m", True)
     show_1y = st.session_state.get("show_1y", True)
     show_5y = st.session_state.get("show_5y", True)
-    hidden_set = set(st.session_state.get("hidden_rounds", []))
-
-    # Apply hidden filter
-    rounds_data = rounds_data_all[~rounds_data_all["Round ID"].astype(int).isin(hidden_set)].copy()
+    hidden = frozenset(st.session_state.get("hidden_rounds", []))
+
+    # Sorted and hidden-filtered once per rounds/hidden change; an unchanged rerun gets the
+    # same frame back, which keys the CSV cache below
+    rounds_data = _session_memo(
+        "_displayed_rounds_cache", (rounds_data_all,), (hidden,),
+        lambda: _displayed_rounds(rounds_data_all, hidden),
+    )
     if rounds_data.empty:
         st.info("All rounds are hidden. Unhide some rounds in the Display panel to see charts and outputs.")
         return
 
-    # Convert columns
-    rounds_data["Round ID"] = pd.to_numeric(rounds_data["Round ID"], errors="coerce")
-    for c in [
-        "Total_profit_two_months", "Total_profit_one_year", "Total_profit_five_year",
-        "Total_emission_two_months", "Total_emission_one_year", "Total_emission_five_year",
-        "Total_demand_two_months", "Total_demand_one_year", "Total_demand_five_year",
-    ]:
-        if c in rounds_data:
-            rounds_data[c] = pd.to_numeric(rounds_data[c], errors="coerce")
-
-    # Prepare X
-    X = rounds_data["Round ID"].astype(int).to_numpy()
-    xticks_vals = sorted(rounds_data["Round ID"].astype(int).unique().tolist())
-
-    # Top spacer (~1 cm)
-    st.markdown('<div style="height:38px;"></div>', unsafe_allow_html=True)
+    # Keyed on the same cheap rounds version: the series and image keys (the full rows)
+    # are only rebuilt and hashed once the displayed rounds or the horizons change
+    flags = (show_2m, show_1y, show_5y)
+    png = _session_memo("_chart_png_cache", (rounds_data,), flags, lambda: _chart_png(rounds_data, flags))
 
     # ---- Charts row ----
-    with plt.rc_context({
-        # Fonts & sizes — Times New Roman everywhere
-        "font.family": "Times New Roman",
-        "font.size": 8,
-        "axes.titlesize": 9,
-        "axes.labelsize": 8,
-        "xtick.labelsize": 7,
-        "ytick.labelsize": 7,
-        "legend.fontsize": 7,
-        # Line aesthetics / resolution
-        "lines.linewidth": 2.0,
-        "lines.markersize": 4,
-        "figure.dpi": 160,  # higher resolution
-    }):
-        fig, axes = plt.subplots(1, 2, figsize=(8.0, 2.6))
-
-        def prettify(ax, title, ylab):
-            ax.set_title(title)
-            ax.set_xlabel("Round")
-            ax.set_ylabel(ylab)
-            ax.grid(True, which="major", linewidth=0.6, alpha=0.35)
-            ax.xaxis.set_major_locator(MaxNLocator(integer=True))
-            ax.set_xticks(xticks_vals)
-            if xticks_vals:
-                ax.set_xlim(min(xticks_vals) - 0.5, max(xticks_vals) + 0.5)
-            for spine in ax.spines.values():
-                spine.set_linewidth(0.8)
-                spine.set_alpha(0.6)
-            _apply_scientific(ax)
-
-        def _safe_div(num_col: str, den_col: str):
-            """Return numpy array of num/den, or None if columns missing."""
-            if num_col not in rounds_data.columns or den_col not in rounds_data.columns:
-                return None
-            num = rounds_data[num_col].to_numpy(dtype=float)
-            den = rounds_data[den_col].replace(0, np.nan).to_numpy(dtype=float)
-            return num / den
-
-        # ---------------- Profit per parcel ----------------
-        axp = axes[0]
-        plotted_any_profit = False
-
-        if show_2m:
-            y = _safe_div("Total_profit_two_months", "Total_demand_two_months")
-            if y is not None:
-                axp.plot(X, y, marker="o", label="2M")
-                plotted_any_profit = True
-
-        if show_1y:
-            y = _safe_div("Total_profit_one_year", "Total_demand_one_year")
-            if y is not None:
-                axp.plot(X, y, marker="s", label="1Y")
-                plotted_any_profit = True
-
-        if show_5y:
-            y = _safe_div("Total_profit_five_year", "Total_demand_five_year")
-            if y is not None:
-                axp.plot(X, y, marker="D", label="5Y")
-                plotted_any_profit = True
-
-        prettify(axp, "Profit per parcel", "AUD / parcel")
-        if plotted_any_profit:
-            axp.legend(loc="best", frameon=False)
-
-        # ---------------- Emissions per parcel ----------------
-        axe = axes[1]
-        plotted_any_emis = False
-
-        if show_2m:
-            y = _safe_div("Total_emission_two_months", "Total_demand_two_months")
-            if y is not None:
-                axe.plot(X, y, marker="o", label="2M")
-                plotted_any_emis = True
-
-        if show_1y:
-            y = _safe_div("Total_emission_one_year", "Total_demand_one_year")
-            if y is not None:
-                axe.plot(X, y, marker="s", label="1Y")
-                plotted_any_emis = True
-
-        if show_5y:
-            y = _safe_div("Total_emission_five_year", "Total_demand_five_year")
-            if y is not None:
-                axe.plot(X, y, marker="D", label="5Y")
-                plotted_any_emis = True
-
-        prettify(axe, "Emissions per parcel", "Cost / parcel (proxy)")
-        if plotted_any_emis:
-            axe.legend(loc="best", frameon=False)
-
-        fig.subplots_adjust(left=0.08, right=0.95, bottom=0.22, top=0.88, wspace=0.5)
-
-        # Invisible anchors for the tour (near the figures)
-        st.markdown('<div id="profit-chart"></div>', unsafe_allow_html=True)
-        st.markdown('<div id="emissions-chart"></div>', unsafe_allow_html=True)
-        try:
-            st.pyplot(fig, clear_figure=True)
-        finally:
-            plt.close(fig)
+    # Top spacer (~1 cm) and the invisible tour anchors (near the figures), as one element
+    st.markdown(
+        '<div style="height:38px;"></div><div id="profit-chart"></div><div id="emissions-chart"></div>',
+        unsafe_allow_html=True,
+    )
+    if png is not None:
+        st.image(png, use_column_width=True)
+    else:
+        # Nothing to plot: don't build and rasterise a figure of empty axes
+        st.info("Switch on at least one horizon (2M / 1Y / 5Y) in the Display panel to see the charts.")
 
     # Bottom spacer (~1 cm)
     st.markdown('<div style="height:38px;"></div>', unsafe_allow_html=True)
@@ -164,83 +356,35 @@ def render_charts_and_tables(rounds_data_all: pd.DataFrame, latest_inputs_series
     # ---- Tables row ----
     t_l, t_r = st.columns([1, 2], gap="small")
 
+    # Each panel header (card, tour anchor, title) is a single markdown element
     with t_l:
-        st.markdown('<div class="panel-card">', unsafe_allow_html=True)
-        st.markdown('<div id="inputs-table"></div>', unsafe_allow_html=True)
-        st.markdown('<div class="panel-title">Inputs (this round)</div>', unsafe_allow_html=True)
+        st.markdown(
+            '<div class="panel-card"><div id="inputs-table"></div>'
+            '<div class="panel-title">Inputs (this round)</div></div>',
+            unsafe_allow_html=True,
+        )
         if latest_inputs_series is not None:
-            df_in = latest_inputs_series.to_frame(name=f"Round {curr}").reset_index()
-            df_in.columns = ["Feature", "Value"]
-            st.dataframe(df_in, hide_index=True, use_container_width=True, height=220)
+            df_in = pd.DataFrame(
+                {"Feature": latest_inputs_series.index, "Value": latest_inputs_series.to_numpy()}
+            )
+            # Arrow stores the column as float64; %g shows the 0/1 levers as ints again
+            st.dataframe(df_in, hide_index=True, use_container_width=True, height=220,
+                         column_config=_INPUT_COLUMN_CONFIG)
         else:
             st.caption("After you run a round, inputs appear here.")
-        st.markdown('</div>', unsafe_allow_html=True)
 
     with t_r:
-        st.markdown('<div class="panel-card">', unsafe_allow_html=True)
-        st.markdown('<div id="outputs-table"></div>', unsafe_allow_html=True)
-        st.markdown('<div class="panel-title">Outputs (displayed rounds)</div>', unsafe_allow_html=True)
-
-        st.dataframe(rounds_data, use_container_width=True, height=220)
-
-        csv = rounds_data.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            "Download CSV (displayed)",
-            data=csv,
-            file_name="carrier_game_results_display.csv",
-            mime="text/csv",
-            use_container_width=True,
+        st.markdown(
+            '<div class="panel-card"><div id="outputs-table"></div>'
+            '<div class="panel-title">Outputs (displayed rounds)</div></div>',
+            unsafe_allow_html=True,
         )
 
-        st.markdown("### 🔼 Upload previous rounds")
-        uploaded_file = st.file_uploader(
-            "Upload a CSV of previous rounds (exported earlier from this app)",
-            type=["csv"],
-            key="round_upload"
+        st.dataframe(
+            _display_frame(rounds_data), column_config=_OUTPUT_COLUMN_CONFIG,
+            use_container_width=True, height=220,
         )
 
-        if uploaded_file is not None:
-            try:
-                import hashlib
-                file_bytes = uploaded_file.getvalue()
-                file_hash = hashlib.md5(file_bytes).hexdigest()
-
-                last_hash = st.session_state.get("last_uploaded_rounds_hash")
-                if last_hash != file_hash:
-                    uploaded_df = pd.read_csv(uploaded_file)
-
-                    required_for_charts = [
-                        "Round ID",
-                        "Total_profit_two_months", "Total_profit_one_year", "Total_profit_five_year",
-                        "Total_emission_two_months", "Total_emission_one_year", "Total_emission_five_year",
-                    ]
-                    missing = [c for c in required_for_charts if c not in uploaded_df.columns]
-                    if missing:
-                        st.error(f"❌ Uploaded CSV is missing required columns for charts: {missing}")
-                    else:
-                        for c in required_for_charts:
-                            uploaded_df[c] = pd.to_numeric(uploaded_df[c], errors="coerce")
-
-                        st.session_state.rounds_results = (
-                            pd.concat([st.session_state.rounds_results, uploaded_df], ignore_index=True)
-                              .drop_duplicates(subset=["Round ID"], keep="last")
-                              .sort_values("Round ID", kind="stable")
-                              .reset_index(drop=True)
-                        )
-
-                        max_round = pd.to_numeric(
-                            st.session_state.rounds_results["Round ID"], errors="coerce"
-                        ).max()
-                        if pd.notna(max_round):
-                            st.session_state.current_round = int(max_round) + 1
-
-                        st.session_state["last_uploaded_rounds_hash"] = file_hash
-                        st.success(f"✅ Imported {len(uploaded_df)} rows. Charts above are now using them.")
-                else:
-                    st.info("This file was already processed. Pick a different file to re-import.")
-            except Exception as e:
-                st.error(f"⚠️ Failed to read uploaded file: {e}")
-
-        st.markdown('</div>', unsafe_allow_html=True)
+        _rounds_io(rounds_data)
 
 
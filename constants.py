@@ -1,6 +1,6 @@
 # constants.py — shared constants and environment setup for the carrier game
 import random
-import math
+from dataclasses import dataclass
 import pandas as pd
 
 # Column names used throughout the app and compute.py
@@ -11,10 +11,57 @@ COLUMNS = [
     "Offpeak_delivery","Signature_required","Redelivery","Tracking","Insurance",
 ]
 
-def init_environment(shippers_geo: pd.DataFrame) -> dict:
+# shipper_data.csv schema, passed to read_csv so it parses straight into these dtypes (no inference pass)
+SHIPPER_GEO_DTYPES = {
+    "Shipper ID": "int64",
+    "Distance to Depot": "float64",
+    "Shipper Volume_share": "float64",
+}
+
+@dataclass(frozen=True)
+class Ctx:
+    """Environment constants read by compute.py (built once by init_environment, never mutated)."""
+    total_area: float
+    CBD_area_for_microhub: float
+    number_of_CBD_deliveries: float
+    number_of_non_CBD_deliveries: float
+    number_of_deliveries: float
+    CDD_share: float
+    failed_delivery_rate: float
+
+    diesel_van_cap: float
+    electric_van_cap: float
+    cargo_bike_cap: float
+    diesel_van_speed: float
+    electric_van_speed: float
+    cargo_bike_speed: float
+    loading_unloading_time: float
+    Vehicels_daily_operating_hours: float
+
+    small_parcel_frequency: float
+    medium_parcel_frequency: float
+    large_parcel_frequency: float
+    diesel_van_operational_cost: float
+    electric_van_operational_cost: float
+    bike_operational_cost: float
+    diesel_van_external_cost: float
+    electric_van_external_cost: float
+    bike_external_cost: float
+    diesel_van_daily_fixed_cost: float
+    electric_van_daily_fixed_cost: float
+    bike_daily_fixed_cost: float
+
+    Share_of_standard: float
+    Share_of_next_day: float
+    Share_of_same_day: float
+    r2: float
+    NS: int
+    E_vol: float
+
+def init_environment(shippers_geo: pd.DataFrame) -> Ctx:
     """
     Recreates the exact environment/constants block from the original app and
-    returns a ctx dict with all names that compute_round_result() expects.
+    returns a Ctx with all names that compute_round_result() expects.
     """
     random.seed(42)
 
@@ -74,17 +121,15 @@ def init_environment(shippers_geo: pd.DataFrame) -> dict:
     Share_of_next_day /= _t
     Share_of_same_day /= _t
 
-    # Geometry / volume factor (note: mutates shippers_geo just like original)
-    shippers_geo['Shipper Volume'] = number_of_deliveries * shippers_geo['Shipper Volume_share']
+    # Geometry / volume factor (the frame is read, not mutated: it is shared across sessions)
     r2 = shippers_geo['Distance to Depot'].mean()
     NS = len(shippers_geo)
     E_vol = (small_parcel_volume * small_parcel_frequency +
              medium_parcel_volume * medium_parcel_frequency +
              large_parcel_volume  * large_parcel_frequency)
 
-    # Pack context with *exact* keys used by compute.py
-    ctx = dict(
-        math=math,
+    # Pack context with *exact* names used by compute.py
+    ctx = Ctx(
         total_area=total_area, CBD_area_for_microhub=CBD_area_for_microhub,
         number_of_CBD_deliveries=number_of_CBD_deliveries,
         number_of_non_CBD_deliveries=number_of_non_CBD_deliveries,
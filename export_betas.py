@@ -0,0 +1,22 @@
+# export_betas.py — estimate both choice models with Biogeme and write the files the
+# pre-estimated app loads: <who>_betas.json (readable) and <who>_betas.npy (scorer-ready)
+import json
+from pathlib import Path
+
+from Recip_choice import run_recipients_choice_model
+from Ship_choice import run_shippers_choice_model
+from scoring import NPY_LAYOUT, save_beta_npy
+
+HERE = Path(__file__).parent
+DATA_PATH = HERE / "New_data.csv"
+
+
+def export_betas(who: str, beta_values: dict) -> None:
+    betas = {k: float(beta_values.get(k, 0.0)) for k in NPY_LAYOUT}
+    (HERE / f"{who}_betas.json").write_text(json.dumps(betas, indent=2), encoding="utf-8")
+    save_beta_npy(HERE / f"{who}_betas.npy", betas)
+
+
+if __name__ == "__main__":
+    export_betas("shippers", run_shippers_choice_model(DATA_PATH, force_reestimate=True)["beta_values"])
+    export_betas("recipients", run_recipients_choice_model(DATA_PATH, force_reestimate=True)["beta_values"])
@@ -0,0 +1,364 @@
+# players_store.py — players snapshot and background Sheets writer for app_pre_estimate.py
+# Nothing here touches Streamlit: the worksheet and the snapshot are resolved on the script
+# thread (app_pre_estimate.py) and passed in, so the writer thread never calls st.*
+import logging
+import operator
+import queue
+import threading
+import time
+from typing import Optional
+
+# Columns we store per player in Google Sheets
+PLAYER_FIELDS = [
+    "email",
+    "created_at",
+    "updated_at",
+    # Existing totals
+    "best_profit_one_year",
+    "best_profit_round_id",
+    "best_emission_one_year",
+    "best_emission_round_id",
+
+    # NEW: per-parcel metrics
+    "best_profit_per_parcel",
+    "best_emission_per_parcel",
+
+    # NEW: attributes of best PROFIT per parcel
+    "best_profit_Next_vs_standard_increase",
+    "best_profit_Same_vs_standard_increase",
+    "best_profit_Delivery_fee_small",
+    "best_profit_Delivery_fee_Medium",
+    "best_profit_Delivery_fee_Large",
+    "best_profit_Diesel_van_share",
+    "best_profit_Electic_van_share",
+    "best_profit_Micro_hub_with_bike",
+    "best_profit_Off_peak_delivery",
+    "best_profit_Signature",
+    "best_profit_redlivery",
+    "best_profit_Tracking",
+    "best_profit_Insurance",
+
+    # NEW: attributes of best EMISSION per parcel
+    "best_emission_Next_vs_standard_increase",
+    "best_emission_Same_vs_standard_increase",
+    "best_emission_Delivery_fee_small",
+    "best_emission_Delivery_fee_Medium",
+    "best_emission_Delivery_fee_Large",
+    "best_emission_Diesel_van_share",
+    "best_emission_Electic_van_share",
+    "best_emission_Micro_hub_with_bike",
+    "best_emission_Off_peak_delivery",
+    "best_emission_Signature",
+    "best_emission_redlivery",
+    "best_emission_Tracking",
+    "best_emission_Insurance",
+]
+
+# Score fields kept as numbers: coerced once when the sheet is read and written back as floats
+_NUMERIC_FIELDS = (
+    "best_profit_one_year", "best_emission_one_year",
+    "best_profit_per_parcel", "best_emission_per_parcel",
+)
+
+def _col_letter(n: int) -> str:
+    """Spreadsheet column letter for 1-based column n (1 -> "A", 27 -> "AA")."""
+    letters = ""
+    while n:
+        n, r = divmod(n - 1, 26)
+        letters = chr(ord("A") + r) + letters
+    return letters
+
+
+# Column letter of each field in the players sheet ("email" -> "A", ...)
+_FIELD_COLS = {f: _col_letter(i) for i, f in enumerate(PLAYER_FIELDS, start=1)}
+# Data block of the players sheet: row 2 down, column A through the last PLAYER_FIELDS column
+_PLAYERS_RANGE = "A2:" + _FIELD_COLS[PLAYER_FIELDS[-1]]
+
+# Blank record; new players start from a copy of it
+EMPTY_REC = dict.fromkeys(PLAYER_FIELDS, "")
+
+# Fetches every field of a record in PLAYER_FIELDS order in one C-level call
+_ROW_GETTER = operator.itemgetter(*PLAYER_FIELDS)
+
+
+def _row_values(rec: dict) -> list:
+    """A record as one sheet row; fields the record lacks are written as blanks."""
+    try:
+        return list(_ROW_GETTER(rec))
+    except KeyError:
+        return [rec.get(f, "") for f in PLAYER_FIELDS]
+
+
+def as_float(v, default):
+    """float(v), or `default` for blanks and other non-numeric cells."""
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return default
+
+
+# ---- Players snapshot ----
+
+# Seconds a players snapshot is reused before the sheet is read again
+PLAYERS_CACHE_TTL = 45
+
+
+def new_players_cache() -> dict:
+    """
+    An empty players snapshot; app_pre_estimate.py keeps one per process and shares it
+    with every session. Writes patch it in place.
+    pending: {email_key: {field: value}} queued but not yet confirmed by Sheets; it is
+    laid back over every refetch so a read can't roll the snapshot back to older values.
+    failed: {email_key: message} for writes that gave up, until that player's session shows it.
+    version: bumped on every change to the snapshot's contents (a refetch or a queued write);
+    keys the leaderboard cache.
+    """
+    return {"ts": 0.0, "data": None, "pending": {}, "failed": {}, "version": 0,
+            "lock": threading.Lock()}
+
+
+def load_players(cache: dict, ws) -> dict:
+    """
+    Return { email_lower: {field: value, ..., "_row": sheet_row_number} },
+    re-reading worksheet `ws` at most once per PLAYERS_CACHE_TTL seconds.
+    The dict is shared: copy a record before changing it.
+    """
+    with cache["lock"]:  # one fetch even when several sessions miss at once
+        if cache["data"] is None or time.time() - cache["ts"] >= PLAYERS_CACHE_TTL:
+            data = fetch_players(ws)
+            # Writes still on their way to Sheets win over what the sheet holds right now
+            for key, fields in cache["pending"].items():
+                data[key] = {**data.get(key, EMPTY_REC), **fields}
+            cache["data"] = data
+            cache["ts"] = time.time()
+            cache["version"] += 1
+        return cache["data"]
+
+
+def fetch_players(ws) -> dict:
+    """
+    Read all players from worksheet `ws` (see load_players for the shape).
+
+    Fetches the bare value grid and maps columns by position to PLAYER_FIELDS, so the
+    header row is never parsed and no per-cell header keys travel over the wire.
+    """
+    n = len(PLAYER_FIELDS)
+    values = ws.get_values(_PLAYERS_RANGE, value_render_option="UNFORMATTED_VALUE")
+
+    players = {}
+    for idx, row in enumerate(values, start=2):  # data starts at row 2
+        email_key = str(row[0]).strip().lower() if row else ""
+        if not email_key:
+            continue
+        if len(row) < n:  # the API drops trailing empty cells
+            row = row + [""] * (n - len(row))
+        r = dict(zip(PLAYER_FIELDS, row))
+        for f in _NUMERIC_FIELDS:  # older rows hold these as text
+            r[f] = as_float(r[f], "")
+        r["_row"] = idx
+        players[email_key] = r
+    return players
+
+
+# ---- Background writer ----
+
+# New players are appended in batches: after one arrives, wait this long for more (or until the batch is full)
+PLAYER_APPEND_FLUSH_S = 2.0
+PLAYER_APPEND_BATCH = 20
+# A failed write is re-queued this many times, after PLAYER_WRITE_BACKOFF_S * 2**attempt seconds
+PLAYER_WRITE_RETRIES = 4
+PLAYER_WRITE_BACKOFF_S = 2.0
+# On shutdown, wait up to this long for queued writes to reach Sheets
+PLAYER_FLUSH_TIMEOUT_S = 10.0
+
+
+def _written_fields(rec: dict, dirty: Optional[dict]) -> dict:
+    """The fields a queued write sends: the dirty cells, or the whole record for a full-row write."""
+    return dict(dirty) if dirty else {k: v for k, v in rec.items() if k != "_row"}
+
+
+def _note_row(cache: dict, rec: dict, row_num: int):
+    """Record a player's sheet row in the snapshot (the fields were patched in when the write was queued)."""
+    with cache["lock"]:
+        if cache["data"] is not None:
+            cache["data"].setdefault(rec["email"].strip().lower(), dict(rec))["_row"] = row_num
+
+
+def _write_player_record(ws, cache: dict, rec: dict, dirty: Optional[dict] = None, *,
+                         row: Optional[int] = None):
+    """
+    Insert or update a single player record in worksheet `ws`.
+    The record must contain all PLAYER_FIELDS and optional '_row'.
+    For an existing row, `dirty` ({field: value}) limits the write to those cells.
+    Pass `row` when the caller already knows the sheet row, to skip the snapshot lookup.
+    """
+    from gspread.utils import a1_to_rowcol
+
+    if row is None:
+        row = load_players(cache, ws).get(rec["email"].strip().lower(), {}).get("_row")
+
+    if row is not None:
+        row_num = row
+        if dirty:
+            # One values.batchUpdate touching only the changed cells
+            ws.batch_update(
+                [{"range": f"{_FIELD_COLS[f]}{row_num}", "values": [[v]]} for f, v in dirty.items()],
+                value_input_option="RAW",
+            )
+        else:
+            # Update existing row starting from column A; width is inferred from values
+            ws.update(f"A{row_num}", [_row_values(rec)])
+    else:
+        # Append new row; the response names the range written, e.g. "players!A12:AI12"
+        resp = ws.append_row(_row_values(rec))
+        updated = resp["updates"]["updatedRange"].split("!")[-1].split(":")[0]
+        row_num = a1_to_rowcol(updated)[0]
+
+    _note_row(cache, rec, row_num)
+
+
+def _append_player_records(ws, cache: dict, recs: list):
+    """Append several new players with one append_rows call and note their sheet rows in the snapshot."""
+    from gspread.utils import a1_to_rowcol
+
+    resp = ws.append_rows([_row_values(rec) for rec in recs], value_input_option="RAW")
+    # The response names the block written, e.g. "players!A12:AI14"; rows follow the order of recs
+    first = resp["updates"]["updatedRange"].split("!")[-1].split(":")[0]
+    first_row = a1_to_rowcol(first)[0]
+    for i, rec in enumerate(recs):
+        _note_row(cache, rec, first_row + i)
+
+
+def _settle_pending(cache: dict, key: str, fields: dict, error: Optional[str] = None):
+    """
+    Drop `fields` from the pending overlay once Sheets has them (values queued later are kept).
+    With `error` the write gave up: the snapshot is refetched on next use, so it falls back to
+    what the sheet really holds, and the player's session is told.
+    """
+    with cache["lock"]:
+        pend = cache["pending"].get(key)
+        if pend is not None:
+            for f, v in fields.items():
+                if f in pend and pend[f] == v:
+                    del pend[f]
+            if not pend:
+                del cache["pending"][key]
+        if error is not None:
+            cache["ts"] = 0.0
+            cache["version"] += 1
+            cache["failed"][key] = error
+
+
+def _retry_or_fail(q: queue.Queue, cache: dict, items: list, exc: Exception):
+    """Re-queue failed (rec, dirty, attempt) writes with exponential backoff; give up after the last try."""
+    log = logging.getLogger("urban_freight")
+    for rec, dirty, attempt in items:
+        key = rec["email"].strip().lower()
+        if attempt < PLAYER_WRITE_RETRIES:
+            delay = PLAYER_WRITE_BACKOFF_S * 2 ** attempt
+            log.warning("player write for %s failed (%s); retry %d in %.0fs", key, exc, attempt + 1, delay)
+            timer = threading.Timer(delay, q.put, args=((rec, dirty, attempt + 1),))
+            timer.daemon = True
+            timer.start()
+        else:
+            log.error("player write for %s failed for good: %s", key, exc)
+            _settle_pending(cache, key, _written_fields(rec, dirty), error=str(exc))
+
+
+def player_writer_loop(q: queue.Queue, ws, cache: dict):
+    """
+    Body of the writer thread: drain queued (rec, dirty, attempt) writes to worksheet `ws`,
+    merging several for one email into a single write. A threading.Event on the queue
+    (see flush_player_writes) ends the batch window at once and is set when the batch has
+    been written.
+    """
+    while True:
+        pending = {}
+        deadline = None  # set once a full-row write (a new player) is waiting
+        flushed = None
+        item = q.get()
+        while item is not None:
+            if isinstance(item, threading.Event):
+                flushed = item
+                break
+            rec, dirty, attempt = item
+            key = rec["email"].strip().lower()
+            if key in pending:
+                _, prev_dirty, prev_attempt = pending[key]
+                # dirty=None means "write the whole row", which covers any partial update
+                dirty = None if prev_dirty is None or dirty is None else {**prev_dirty, **dirty}
+                attempt = min(attempt, prev_attempt)
+            pending[key] = (rec, dirty, attempt)
+            if dirty is None and deadline is None:
+                deadline = time.monotonic() + PLAYER_APPEND_FLUSH_S
+            try:
+                if deadline is None or len(pending) >= PLAYER_APPEND_BATCH:
+                    item = q.get_nowait()
+                else:
+                    item = q.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+        if pending:
+            _write_player_batch(q, ws, cache, pending)
+        if flushed is not None:
+            flushed.set()
+
+
+def _write_player_batch(q: queue.Queue, ws, cache: dict, pending: dict):
+    """Send one merged batch: new players in one append, the rest as cell updates."""
+    try:
+        players = load_players(cache, ws)
+    except Exception as exc:
+        _retry_or_fail(q, cache, list(pending.values()), exc)
+        return
+    # Players without a sheet row yet go out together; the rest are cell updates
+    new_keys = [key for key in pending if "_row" not in players.get(key, {})]
+    if new_keys:
+        try:
+            _append_player_records(ws, cache, [pending[key][0] for key in new_keys])
+        except Exception as exc:
+            _retry_or_fail(q, cache, [pending[key] for key in new_keys], exc)
+        else:
+            for key in new_keys:
+                rec, dirty, _ = pending[key]
+                _settle_pending(cache, key, _written_fields(rec, dirty))
+    for key, (rec, dirty, attempt) in pending.items():
+        if key in new_keys:
+            continue
+        try:
+            _write_player_record(ws, cache, rec, dirty, row=players[key]["_row"])
+        except Exception as exc:
+            _retry_or_fail(q, cache, [(rec, dirty, attempt)], exc)
+        else:
+            _settle_pending(cache, key, _written_fields(rec, dirty))
+
+
+def flush_player_writes(q: queue.Queue):
+    """atexit: end the writer's batch window and wait (bounded) for queued writes to land."""
+    done = threading.Event()
+    q.put(done)
+    done.wait(PLAYER_FLUSH_TIMEOUT_S)
+
+
+def queue_player_write(q: queue.Queue, cache: dict, rec: dict, dirty: Optional[dict] = None):
+    """
+    Apply a player change to the snapshot now and hand it to the writer thread on `q`.
+    Failed writes are retried with backoff; one that gives up is reported by
+    player_write_failure().
+    """
+    email_key = rec["email"].strip().lower()
+    with cache["lock"]:
+        if cache["data"] is not None:
+            row = cache["data"].get(email_key, {}).get("_row")
+            cache["data"][email_key] = {**rec, "_row": row} if row else dict(rec)
+        cache["version"] += 1
+        pend = cache["pending"].setdefault(email_key, {})
+        pend.update(_written_fields(rec, dirty))
+    q.put((rec, dirty, 0))
+
+
+def player_write_failure(cache: dict, email: str) -> Optional[str]:
+    """The error of a player write that gave up since the last call (then cleared), else None."""
+    with cache["lock"]:
+        return cache["failed"].pop(email.strip().lower(), None)
@@ -0,0 +1,131 @@
+# scoring.py — vectorised binary-logit scoring shared by the shipper/recipient choice modules
+import logging
+import math
+import numpy as np
+import pandas as pd
+
+# Observation columns (as built in compute.py) and the beta weighting each one, in matching order
+FEATURE_KEYS = [
+    "Next_day_delivery_increase", "Same_day_delivery_increase",
+    "Delivery_fee_small", "Medium_parcels_delivery_fee",
+    "Share_of_diesel_vans", "Microhub_delivery", "Offpeak_delivery",
+    "Insurance", "Tracking", "Redelivery", "Signature_required",
+]
+BETA_KEYS = [
+    "B_Next_vs_standard_increase", "B_Same_vs_standard_increase",
+    "B_Delivery_fee_small", "B_Delivery_fee_Medium",
+    "B_Diesel_van", "B_Micro_hub_with_bike", "B_Off_peak",
+    "B_Insurance", "B_Tracking", "B_Redelivery", "B_Signature",
+]
+ASC_KEY = "ASC_accept"
+
+# Layout of the compact <who>_betas.npy files written by export_betas.py
+NPY_LAYOUT = [ASC_KEY] + BETA_KEYS
+
+
+def sigmoid(u) -> np.ndarray:
+    """Logistic function that never exponentiates a positive argument (no overflow for large |u|)."""
+    u = np.asarray(u, dtype=np.float64)
+    z = np.exp(-np.abs(u))
+    return np.where(u >= 0, 1.0 / (1.0 + z), z / (1.0 + z))
+
+
+def _sigmoid_scalar(x: float) -> float:
+    """Scalar twin of sigmoid(): split on sign so math.exp never overflows."""
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1.0 + z)
+
+
+def prepare_betas(beta_values) -> tuple:
+    """Freeze a beta dict into the read-only (beta_vec, asc) pair the scorers consume."""
+    beta_vec = np.fromiter(
+        (float(beta_values.get(k, 0.0)) for k in BETA_KEYS), dtype=np.float64, count=len(BETA_KEYS)
+    )
+    beta_vec.flags.writeable = False
+    return beta_vec, float(beta_values.get(ASC_KEY, 0.0))
+
+
+def save_beta_npy(path, beta_values) -> None:
+    """Write betas as a float64 vector in NPY_LAYOUT order (ASC first)."""
+    np.save(path, np.array([float(beta_values.get(k, 0.0)) for k in NPY_LAYOUT], dtype=np.float64))
+
+
+def load_beta_npy(path) -> tuple:
+    """Read a NPY_LAYOUT vector back as the read-only (beta_vec, asc) pair."""
+    arr = np.load(path)
+    if arr.shape != (len(NPY_LAYOUT),):
+        raise ValueError(f"{path} holds {arr.shape}, expected {len(NPY_LAYOUT)} betas in NPY_LAYOUT order")
+    beta_vec = arr[1:]
+    beta_vec.flags.writeable = False
+    return beta_vec, float(arr[0])
+
+
+def load_beta_params(beta_values, npy_path) -> tuple:
+    """
+    The (beta_vec, asc) pair for `beta_values` (the JSON), read from npy_path when it holds the
+    same betas. The JSON is the source of truth: a missing, malformed or stale .npy (one that
+    np.allclose says differs) is ignored with a warning and the pair is built from the JSON.
+    """
+    json_vec, json_asc = prepare_betas(beta_values)
+    try:
+        beta_vec, asc = load_beta_npy(npy_path)
+    except (OSError, ValueError) as exc:
+        if not isinstance(exc, FileNotFoundError):
+            logging.getLogger("urban_freight").warning("ignoring %s: %s", npy_path, exc)
+        return json_vec, json_asc
+    if not (np.allclose(beta_vec, json_vec) and np.isclose(asc, json_asc)):
+        logging.getLogger("urban_freight").warning(
+            "%s does not match its JSON; using the JSON (re-run export_betas.py)", npy_path
+        )
+        return json_vec, json_asc
+    return beta_vec, asc
+
+
+def as_beta_params(betas) -> tuple:
+    """Accept either a prepared (beta_vec, asc) pair or a legacy beta dict."""
+    if isinstance(betas, tuple):
+        return betas
+    return prepare_betas(betas)
+
+
+def score_batch(beta_values, observations) -> np.ndarray:
+    """
+    Return P(accept) for every row of `observations` as a float64 vector.
+    beta_values: (beta_vec, asc) from prepare_betas(), or the raw beta dict.
+    observations: DataFrame holding FEATURE_KEYS, or a 2-D array already in FEATURE_KEYS order.
+    """
+    beta_vec, asc = as_beta_params(beta_values)
+    if isinstance(observations, pd.DataFrame):
+        X = observations[FEATURE_KEYS].to_numpy(dtype=np.float64, copy=False)
+    else:
+        X = np.asarray(observations, dtype=np.float64).reshape(-1, len(FEATURE_KEYS))
+    return sigmoid(X @ beta_vec + asc)
+
+
+def feature_row(observation) -> list:
+    """
+    One observation as plain floats in FEATURE_KEYS order. Accepts a one-row DataFrame,
+    a Series or dict keyed by column name, or a 1-D array already in FEATURE_KEYS order.
+    """
+    if isinstance(observation, pd.DataFrame):
+        return observation[FEATURE_KEYS].to_numpy(dtype=np.float64)[0].tolist()
+    if isinstance(observation, pd.Series):
+        return observation.reindex(FEATURE_KEYS).to_numpy(dtype=np.float64).tolist()
+    if isinstance(observation, np.ndarray):
+        return observation.astype(np.float64, copy=False).ravel().tolist()
+    return [float(observation[k]) for k in FEATURE_KEYS]
+
+
+def score_one(beta_values, observation) -> float:
+    """
+    P(accept) for one observation (any form feature_row() accepts).
+    Plain-float loop: for a single row this beats NumPy's per-call dispatch overhead.
+    """
+    beta_vec, asc = as_beta_params(beta_values)
+    x = feature_row(observation)
+    u = asc
+    for b, v in zip(beta_vec.tolist(), x):
+        u += b * v
+    return _sigmoid_scalar(u)
@@ -0,0 +1,37 @@
+# conftest.py — shared fixtures; the modules live at the repo root, next to the apps
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from constants import SHIPPER_GEO_DTYPES, init_environment  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def models():
+    """The pre-estimated betas and scorers, keyed as in the apps' load_models_static()."""
+    import Recip_choice_pre_estimate as recip
+    import Ship_choice_pre_estimate as ship
+
+    s = ship.run_shippers_choice_model(None)
+    r = recip.run_recipients_choice_model(None)
+    return {
+        "shippers_beta_values": s["beta_values"],
+        "recipients_beta_values": r["beta_values"],
+        "shippers_beta_params": (s["beta_vec"], s["asc"]),
+        "recipients_beta_params": (r["beta_vec"], r["asc"]),
+        "calculate_probability_of_selecting_by_shippers": ship.calculate_probability_of_selecting_by_shippers,
+        "calculate_probability_of_selecting_by_recipients": recip.calculate_probability_of_selecting_by_recipients,
+        "calculate_probabilities_shippers_batch": ship.calculate_probabilities_shippers_batch,
+        "calculate_probabilities_recipients_batch": recip.calculate_probabilities_recipients_batch,
+    }
+
+
+@pytest.fixture(scope="session")
+def ctx():
+    geo = pd.read_csv(ROOT / "shipper_data.csv", usecols=list(SHIPPER_GEO_DTYPES), dtype=SHIPPER_GEO_DTYPES)
+    return init_environment(geo)
@@ -0,0 +1,97 @@
+# test_app_common.py — session-state helpers, the cached compute path and background URLs
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+
+import app_common
+from app_common import (
+    compute_round_cached, ensure_defaults, inputs_series, reset_rounds, rounds_df,
+)
+from compute import compute_round_result
+from constants import COLUMNS
+
+BASE = [0.2, 0.5, 2.0, 3.0, 18.0, 60.0, 40.0, 1, 0, 1, 0, 0, 1]
+
+
+@pytest.fixture(autouse=True)
+def session():
+    """A clean st.session_state (bare mode: one dict for the whole process) around every test."""
+    st.session_state.clear()
+    yield st.session_state
+    st.session_state.clear()
+
+
+def test_ensure_defaults_fills_missing_keys_once(session):
+    session["diesel_share"] = 35
+    ensure_defaults()
+    assert session["diesel_share"] == 35  # values already set are kept
+    assert session["page"] == "home" and session["rounds_rows"] == []
+    # Factories give each session its own list
+    assert session["rounds_rows"] is not app_common._DEFAULTS["rounds_rows"]
+
+    del session["page"]
+    ensure_defaults()  # filled once per session: later calls return straight away
+    assert "page" not in session
+
+
+def test_reset_rounds_restores_defaults_and_drops_the_frame(session):
+    ensure_defaults()
+    session.rounds_rows.append({"Round ID": 1, "x": 1.0})
+    session.round_ids.append(1)
+    session.current_round = 2
+    session.hidden_rounds = [1]
+    rounds_df()
+
+    reset_rounds()
+    assert session.rounds_rows == [] and session.round_ids == [] and session.hidden_rounds == []
+    assert session.current_round == 1
+    assert "_rounds_df_cache" not in session
+    assert rounds_df().empty
+
+
+def test_rounds_df_is_rebuilt_only_when_rows_change(session):
+    ensure_defaults()
+    session.rounds_rows.append({"Round ID": 1, "x": 1.0})
+    first = rounds_df()
+    assert rounds_df() is first
+
+    session.rounds_rows.append({"Round ID": 2, "x": 2.0})  # appended in place
+    second = rounds_df()
+    assert second is not first and second["Round ID"].tolist() == [1, 2]
+
+    session.rounds_rows = [{"Round ID": 5, "x": 5.0}, {"Round ID": 6, "x": 6.0}]  # replaced, same length
+    assert rounds_df()["Round ID"].tolist() == [5, 6]
+
+
+def test_compute_round_cached_matches_compute_round_result(models, ctx):
+    inputs = tuple(float(v) for v in BASE)
+    cached = compute_round_cached(inputs, tuple(COLUMNS), models, ctx)
+    assert cached["Round ID"] is None
+    expected = compute_round_result(None, pd.Series(inputs, index=COLUMNS), COLUMNS, models, ctx)
+    assert cached == expected
+
+    # A hit is a copy: stamping the Round ID on it doesn't leak into the cache
+    cached["Round ID"] = 3
+    assert compute_round_cached(inputs, tuple(COLUMNS), models, ctx)["Round ID"] is None
+
+
+def test_inputs_series_shows_levers_as_ints():
+    s = inputs_series(np.array(BASE, dtype=np.float64))
+    assert list(s.index) == COLUMNS
+    assert [type(v) for v in s[["Microhub_delivery", "Insurance"]]] == [int, int]
+    assert type(s["Delivery_fee_small"]) is float
+
+
+def test_background_url_uses_the_static_route(tmp_path, monkeypatch):
+    img = tmp_path / "background1.png"
+    img.write_bytes(b"\x89PNG")
+    monkeypatch.setattr(st, "get_option", lambda key: True)
+    assert app_common._background_url(str(img), 123) == "app/static/background1.png?v=123"
+
+
+def test_background_url_falls_back_to_a_data_uri(tmp_path, monkeypatch):
+    img = tmp_path / "background2.jpg"
+    img.write_bytes(b"jpeg")
+    monkeypatch.setattr(st, "get_option", lambda key: False)
+    assert app_common._background_url(str(img), 123) == "data:image/jpeg;base64,anBlZw=="
@@ -0,0 +1,72 @@
+# test_compute.py — the batch path (compute_rounds) must match compute_round_result row for row
+import math
+
+import numpy as np
+import pandas as pd
+
+from compute import compute_round_result, compute_rounds
+from constants import COLUMNS
+
+NAN = float("nan")
+BASE = dict(zip(COLUMNS, [0.2, 0.5, 2.0, 3.0, 18.0, 60.0, 40.0, 1, 0, 1, 0, 0, 1]))
+
+# Messy rows: NaN / half-way / negative / out-of-range levers, and shares outside [0, 100] or missing
+OVERRIDES = [
+    {},
+    {"Microhub_delivery": NAN, "Tracking": NAN},
+    {"Tracking": 0.5, "Insurance": 1.5, "Redelivery": 2.5, "Signature_required": 0.49},
+    {"Offpeak_delivery": -0.6, "Microhub_delivery": 0.51, "Insurance": 3.0},
+    {"Share_of_diesel_vans": 130.0, "Share_of_electric_vans": -30.0},
+    {"Share_of_diesel_vans": NAN, "Share_of_electric_vans": 0.0},
+    {"Share_of_diesel_vans": 0.0, "Share_of_electric_vans": 100.0, "Microhub_delivery": 1},
+    {"Next_day_delivery_increase": 1.0, "Same_day_delivery_increase": 2.0, "Large_parcels_delivery_fee": 40.0},
+]
+
+
+def _same(a, b) -> bool:
+    a, b = float(a), float(b)
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return math.isclose(a, b, rel_tol=1e-12, abs_tol=1e-9)
+
+
+def _rows():
+    rng = np.random.default_rng(0)
+    rows = [{**BASE, **o} for o in OVERRIDES]
+    for _ in range(40):
+        row = dict(BASE)
+        row.update(Delivery_fee_small=rng.uniform(0, 10), Medium_parcels_delivery_fee=rng.uniform(0, 15))
+        row["Share_of_diesel_vans"] = rng.uniform(-20, 120)
+        row["Share_of_electric_vans"] = 100 - row["Share_of_diesel_vans"]
+        for c in ("Microhub_delivery", "Offpeak_delivery", "Signature_required", "Redelivery", "Tracking", "Insurance"):
+            row[c] = rng.choice([NAN, -0.5, 0.0, 0.5, 1.0, 1.5, rng.uniform(-1, 2)])
+        rows.append(row)
+    return rows
+
+
+def test_compute_rounds_matches_compute_round_result(models, ctx):
+    rows = _rows()
+    batch = compute_rounds(range(1, len(rows) + 1), pd.DataFrame(rows), COLUMNS, models, ctx)
+    assert len(batch) == len(rows)
+    for i, row in enumerate(rows):
+        one = compute_round_result(i + 1, pd.Series(row)[COLUMNS], COLUMNS, models, ctx)
+        assert list(one) == list(batch.columns)
+        for key, value in one.items():
+            assert _same(value, batch.iloc[i][key]), (i, key, value, batch.iloc[i][key])
+
+
+def test_assume_clean_matches_sanitized_path(models, ctx):
+    row = pd.Series([float(BASE[c]) for c in COLUMNS], index=COLUMNS)
+    clean = compute_round_result(1, row, COLUMNS, models, ctx, assume_clean=True)
+    assert clean == compute_round_result(1, row, COLUMNS, models, ctx)
+
+
+def test_levers_come_out_as_ints(models, ctx):
+    levers = ["Micro_hub_with_bike", "Off_peak_delivery", "Signature", "redlivery", "Tracking", "Insurance",
+              "Micro Hub Delivery", "Redelivery"]
+    rows = _rows()
+    batch = compute_rounds(range(1, len(rows) + 1), pd.DataFrame(rows), COLUMNS, models, ctx)
+    assert all(batch[c].dtype == np.int64 for c in levers)
+    assert set(batch[levers].to_numpy().ravel()) <= {0, 1}
+    one = compute_round_result(1, pd.Series(rows[1])[COLUMNS], COLUMNS, models, ctx)
+    assert all(type(one[c]) is int for c in levers)
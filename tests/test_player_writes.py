@@ -0,0 +1,124 @@
+# test_player_writes.py — the background players writer against an in-memory worksheet
+import queue
+import threading
+import time
+
+from gspread.utils import a1_to_rowcol
+
+import players_store as ps
+from players_store import PLAYER_FIELDS
+
+
+class FakeWorksheet:
+    """Just the gspread.Worksheet calls players_store makes, over a list of rows (row 2 = rows[0])."""
+
+    def __init__(self, records=(), fail=None):
+        self.rows = [ps._row_values({**ps.EMPTY_REC, **r}) for r in records]
+        self.fail = fail  # exception raised by every write, when set
+        self.writes = 0
+
+    def _write(self):
+        self.writes += 1
+        if self.fail is not None:
+            raise self.fail
+
+    def get_values(self, rng, value_render_option=None):
+        return [list(r) for r in self.rows]
+
+    def batch_update(self, data, value_input_option=None):
+        self._write()
+        for d in data:
+            row, col = a1_to_rowcol(d["range"])
+            self.rows[row - 2][col - 1] = d["values"][0][0]
+
+    def update(self, rng, values):
+        self._write()
+        self.rows[int(rng[1:]) - 2] = list(values[0])
+
+    def append_rows(self, values, value_input_option=None):
+        self._write()
+        first = len(self.rows) + 2
+        self.rows.extend(list(v) for v in values)
+        return {"updates": {"updatedRange": f"players!A{first}:AI{len(self.rows) + 1}"}}
+
+    def append_row(self, values):
+        return self.append_rows([values])
+
+
+def _start_writer(ws, cache):
+    q = queue.Queue()
+    threading.Thread(target=ps.player_writer_loop, args=(q, ws, cache), daemon=True).start()
+    return q
+
+
+def _wait_for(cond, timeout=5.0):
+    end = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.01)
+
+
+def test_failed_write_retries_then_reports(monkeypatch):
+    monkeypatch.setattr(ps, "PLAYER_WRITE_RETRIES", 2)
+    monkeypatch.setattr(ps, "PLAYER_WRITE_BACKOFF_S", 0.01)
+    ws = FakeWorksheet([{"email": "a@x.org", "best_profit_one_year": 1.0}], fail=RuntimeError("quota"))
+    cache = ps.new_players_cache()
+    rec = dict(ps.load_players(cache, ws)["a@x.org"])
+    q = _start_writer(ws, cache)
+
+    ps.queue_player_write(q, cache, {**rec, "best_profit_one_year": 5.0}, {"best_profit_one_year": 5.0})
+    _wait_for(lambda: cache["failed"])
+
+    assert ws.writes == 3  # the first try and two retries
+    assert ps.player_write_failure(cache, "A@x.org") == "quota"
+    assert ps.player_write_failure(cache, "a@x.org") is None
+    assert cache["pending"] == {}
+    # The snapshot is refetched on next use and falls back to what the sheet holds
+    assert cache["ts"] == 0.0
+    assert ps.load_players(cache, ws)["a@x.org"]["best_profit_one_year"] == 1.0
+
+
+def test_pending_write_survives_a_refetch():
+    ws = FakeWorksheet([{"email": "a@x.org", "best_profit_one_year": 1.0}])
+    cache = ps.new_players_cache()
+    rec = dict(ps.load_players(cache, ws)["a@x.org"])
+    q = queue.Queue()  # no writer yet: the write stays pending
+
+    ps.queue_player_write(q, cache, {**rec, "best_profit_one_year": 5.0}, {"best_profit_one_year": 5.0})
+    version = cache["version"]
+    cache["ts"] = 0.0
+    assert ps.load_players(cache, ws)["a@x.org"]["best_profit_one_year"] == 5.0
+    assert cache["version"] == version + 1
+
+    threading.Thread(target=ps.player_writer_loop, args=(q, ws, cache), daemon=True).start()
+    _wait_for(lambda: not cache["pending"])
+    cache["ts"] = 0.0
+    assert ps.load_players(cache, ws)["a@x.org"]["best_profit_one_year"] == 5.0
+    assert ws.rows[0][PLAYER_FIELDS.index("best_profit_one_year")] == 5.0
+
+
+def test_flush_writes_new_players_without_waiting_for_the_batch(monkeypatch):
+    monkeypatch.setattr(ps, "PLAYER_APPEND_FLUSH_S", 60.0)
+    ws = FakeWorksheet([{"email": "a@x.org"}])
+    cache = ps.new_players_cache()
+    ps.load_players(cache, ws)
+    q = _start_writer(ws, cache)
+
+    for email in ("b@x.org", "c@x.org"):
+        ps.queue_player_write(q, cache, {**ps.EMPTY_REC, "email": email})
+    start = time.monotonic()
+    ps.flush_player_writes(q)
+
+    assert time.monotonic() - start < ps.PLAYER_FLUSH_TIMEOUT_S
+    assert ws.writes == 1  # both new players in one append
+    assert [r[0] for r in ws.rows] == ["a@x.org", "b@x.org", "c@x.org"]
+    assert cache["pending"] == {}
+    assert cache["data"]["c@x.org"]["_row"] == 4
+
+
+def test_flush_returns_after_the_timeout_when_the_writer_is_stuck(monkeypatch):
+    monkeypatch.setattr(ps, "PLAYER_FLUSH_TIMEOUT_S", 0.05)
+    q = queue.Queue()  # nothing drains it
+    start = time.monotonic()
+    ps.flush_player_writes(q)
+    assert 0.04 <= time.monotonic() - start < 1.0